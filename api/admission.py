@@ -0,0 +1,176 @@
+# admission.py
+"""
+Admission control for the ThreatGuard API.
+
+Every request is mapped to a lane by path prefix (settings.yaml,
+api.admission.lanes). A lane allows `max_concurrent` requests to run and
+up to `max_queue` more to wait, for at most `queue_timeout_sec`:
+- queue full           -> 429 Too Many Requests
+- waited too long      -> 503 Service Unavailable
+Both carry Retry-After, estimated from the lane's recent service time.
+
+Admission runs in the ASGI middleware, on the event loop, before a
+handler is dispatched to the threadpool, so shed requests never occupy a
+worker thread. Lanes have separate capacity: expensive lanes (LLM-backed
+/action/run) are capped well below the threadpool size and cannot starve
+cheap ones such as /system/health. Requests matching no lane pass through.
+
+GET /admission returns queue depth, in-flight count and shed counters
+per lane.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+from utils.config import get_setting
+
+# used when settings.yaml has no api.admission.lanes
+DEFAULT_LANES = [
+    {"name": "health", "prefixes": ["/system/health", "/admission"],
+     "max_concurrent": 8, "max_queue": 32, "queue_timeout_sec": 2.0},
+    {"name": "scan", "prefixes": ["/file/"],
+     "max_concurrent": 8, "max_queue": 16, "queue_timeout_sec": 10.0},
+    {"name": "llm", "prefixes": ["/action/"],
+     "max_concurrent": 2, "max_queue": 4, "queue_timeout_sec": 30.0},
+]
+
+
+class Lane:
+    def __init__(self, name: str, prefixes: List[str], max_concurrent: int = 4,
+                 max_queue: int = 8, queue_timeout_sec: float = 10.0):
+        self.name = name
+        self.prefixes = tuple(prefixes)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = float(queue_timeout_sec)
+        self.in_flight = 0
+        self._waiters = deque()
+        # counters
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self._avg_service = 0.0
+
+    # -----------------------------
+    # Slots
+    # -----------------------------
+    async def acquire(self):
+        """Take a slot. Returns None when admitted, else (status, retry_after)."""
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            return 429, self.retry_after()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # the slot was handed over just as the timeout fired
+                self.admitted += 1
+                return None
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            self.shed_timeout += 1
+            return 503, self.retry_after()
+        except asyncio.CancelledError:
+            # client went away while queued
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        self.admitted += 1
+        return None
+
+    def release(self, service_time: float) -> None:
+        if service_time:
+            self._avg_service = service_time if not self._avg_service else 0.8 * self._avg_service + 0.2 * service_time
+        # hand the slot straight to the next waiter, in_flight stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def retry_after(self) -> int:
+        backlog = len(self._waiters) + self.in_flight
+        return max(1, math.ceil(self._avg_service * backlog / self.max_concurrent))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": {"queue_full": self.shed_queue_full, "timeout": self.shed_timeout},
+            "avg_service_ms": round(self._avg_service * 1000, 1),
+        }
+
+
+class AdmissionController:
+    def __init__(self, lanes: List[Dict[str, Any]] = None):
+        lanes = lanes or get_setting("api", "admission", {}).get("lanes") or DEFAULT_LANES
+        self.lanes = [Lane(**lane) for lane in lanes]
+
+    def lane_for(self, path: str):
+        for lane in self.lanes:
+            if path.startswith(lane.prefixes):
+                return lane
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {lane.name: lane.stats() for lane in self.lanes}
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: admits, queues or sheds each HTTP request."""
+
+    def __init__(self, app, controller: AdmissionController = None):
+        self.app = app
+        self.controller = controller or AdmissionController()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        lane = self.controller.lane_for(scope["path"])
+        if lane is None:
+            return await self.app(scope, receive, send)
+
+        rejected = await lane.acquire()
+        if rejected is not None:
+            status, retry_after = rejected
+            return await self._reject(send, lane, status, retry_after)
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(time.monotonic() - start)
+
+    @staticmethod
+    async def _reject(send, lane: Lane, status: int, retry_after: int) -> None:
+        reason = "queue full" if status == 429 else "timed out waiting in queue"
+        body = (
+            '{"detail": "%s lane saturated (%s)", "retry_after": %d}' % (lane.name, reason, retry_after)
+        ).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,24 +1,43 @@
-from fastapi import FastAPI
+from typing import Optional
+
+from fastapi import APIRouter, FastAPI, Header, HTTPException
 from pydantic import BaseModel
 import uvicorn
 
-from src.agents.orchestrator_agent import OrchestratorAgent
+from agents.orchestrator_agent import OrchestratorAgent
+from memory.memory_bank import get_shared_memory_bank
+from utils.profiler import profile_run, profiling_requested
+
+router = APIRouter()
 
-app = FastAPI(title="ThreatGuard AI Security Agent API")
+REPORT_MODES = ("full", "run", "delta")
 
 class ScanRequest(BaseModel):
-    mode: str = "full"   # can be extended later
+    # report mode (see OrchestratorAgent): "run" returns only this run's records;
+    # "full" exports the whole shared memory bank and grows with history
+    mode: str = "run"
+    since: Optional[int] = None   # memory cursor for "delta"
+    profile: bool = False   # or send "X-ThreatGuard-Profile: 1"
 
-@app.post("/run")
-def run_threatguard(req: ScanRequest):
-    orchestrator = OrchestratorAgent()
-    result = orchestrator.run()
-    return {
+@router.post("/run")
+def run_threatguard(req: ScanRequest, x_threatguard_profile: Optional[str] = Header(None)):
+    if req.mode not in REPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(REPORT_MODES)}")
+    enabled = req.profile or profiling_requested(x_threatguard_profile)
+    with profile_run(enabled, "action-run") as prof:
+        # one MemoryBank per worker process instead of one per request
+        orchestrator = OrchestratorAgent(memory=get_shared_memory_bank())
+        result = orchestrator.run(report_mode=req.mode, since=req.since)
+    response = {
         "message": "ThreatGuard executed successfully",
         "mode_used": req.mode,
         "report": result
     }
+    if prof.summary:
+        response["profile"] = prof.summary
+    return response
 
 if __name__ == "__main__":
+    app = FastAPI(title="ThreatGuard AI Security Agent API")
+    app.include_router(router, prefix="/action")
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
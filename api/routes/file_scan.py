@@ -1,21 +1,29 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Header
 from pydantic import BaseModel
 
-from src.tools.file_scanner import FileScanner
+from tools.file_scanner import FileScannerTool
+from utils.profiler import profile_run, profiling_requested
 
 router = APIRouter()
 
 class FileScanRequest(BaseModel):
     file_path: str
+    profile: bool = False   # or send "X-ThreatGuard-Profile: 1"
 
 @router.post("/scan")
-def scan_file(req: FileScanRequest):
-    scanner = FileScanner()
-    result = scanner.scan_file(req.file_path)
-    
-    return {
+def scan_file(req: FileScanRequest, x_threatguard_profile: Optional[str] = Header(None)):
+    enabled = req.profile or profiling_requested(x_threatguard_profile)
+    with profile_run(enabled, "file-scan") as prof:
+        scanner = FileScannerTool()
+        result = scanner.scan_file(req.file_path)
+
+    response = {
         "message": "File scan completed",
         "input_file": req.file_path,
         "scan_result": result
     }
-
+    if prof.summary:
+        response["profile"] = prof.summary
+    return response
@@ -1,15 +1,77 @@
-from fastapi import APIRouter
-from src.tools.system_analyzer import SystemAnalyzer
+import math
+import threading
+import time
+
+from fastapi import APIRouter, HTTPException
+from tools.system_analyzer import SystemAnalyzerTool
 
 router = APIRouter()
 
+# The full scan walks the filesystem, so health checks are served from a
+# cache. An expired entry is still served while one background thread
+# refreshes it. Only a cold cache (no result yet) waits for that refresh,
+# without holding _health_lock and for at most COLD_WAIT_SEC; after that
+# it gets 503 with Retry-After, like a request shed by admission.
+HEALTH_TTL_SEC = 30
+COLD_WAIT_SEC = 2.0
+# Retry-After guess before the first scan has been timed
+DEFAULT_SCAN_SEC = 10.0
+_health_cache = {"ts": 0.0, "result": None, "error": None, "started": 0.0, "duration": None}
+_health_lock = threading.Lock()
+_refresh_done = threading.Event()
+_refreshing = False
+
+
+def _refresh():
+    global _refreshing
+    start = time.time()
+    try:
+        result, error = SystemAnalyzerTool().scan_system(), None
+    except Exception as e:
+        result, error = None, str(e)
+    with _health_lock:
+        if result is not None:
+            _health_cache["result"] = result
+            _health_cache["ts"] = time.time()
+        _health_cache["error"] = error
+        _health_cache["duration"] = time.time() - start
+        _refreshing = False
+        _refresh_done.set()
+
+
+def _start_refresh():
+    """Start a refresh unless one is running. Caller holds _health_lock."""
+    global _refreshing
+    if not _refreshing:
+        _refreshing = True
+        _health_cache["started"] = time.time()
+        _refresh_done.clear()
+        threading.Thread(target=_refresh, name="health-refresh", daemon=True).start()
+
+
 @router.get("/health")
 def system_health():
-    analyzer = SystemAnalyzer()
-    result = analyzer.analyze()
+    with _health_lock:
+        if _health_cache["result"] is None or time.time() - _health_cache["ts"] > HEALTH_TTL_SEC:
+            _start_refresh()
+        cold = _health_cache["result"] is None
+
+    if cold:
+        _refresh_done.wait(COLD_WAIT_SEC)
+
+    with _health_lock:
+        result, ts, error = _health_cache["result"], _health_cache["ts"], _health_cache["error"]
+        refreshing = _refreshing
+        expected = _health_cache["duration"] or DEFAULT_SCAN_SEC
+        remaining = expected - (time.time() - _health_cache["started"])
+    if result is None:
+        detail = "System health scan in progress" if refreshing else f"System health scan failed: {error}"
+        retry_after = max(1, math.ceil(remaining)) if refreshing else 1
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
 
     return {
         "message": "System health scan completed",
+        "cache_age_sec": round(time.time() - ts, 1),
+        "refreshing": refreshing,
         "system_status": result
     }
-
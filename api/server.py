@@ -1,4 +1,17 @@
+import os
+import sys
+
+# Single import root: src/ (as in main.py: tools.*, memory.*, utils.*), plus
+# this directory for admission and routes. Importing the same code as both
+# src.X and X would create two copies of every module and its singletons.
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(API_DIR), "src")
+for path in (SRC_DIR, API_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
 from fastapi import FastAPI
+from admission import AdmissionController, AdmissionMiddleware
 from routes.action import router as action_router
 from routes.file_scan import router as file_scan_router
 from routes.system_scan import router as system_scan_router
@@ -9,8 +22,18 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Per-route concurrency limits and load shedding (see admission.py)
+admission = AdmissionController()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Register routes
 app.include_router(action_router, prefix="/action", tags=["Action Agent"])
 app.include_router(file_scan_router, prefix="/file", tags=["File Scanner"])
 app.include_router(system_scan_router, prefix="/system", tags=["System Analyzer"])
 
+
+@app.get("/admission", tags=["Admission"])
+def admission_stats():
+    """Queue depth, in-flight requests and shed counts per lane."""
+    return admission.stats()
+
@@ -2,27 +2,71 @@
 """
 ActionAgent for executing automated responses
 based on the threat category identified by ThreatClassifierAgent.
+
+Which actions run for a threat is decided by the declarative ActionPolicy
+(config/action_policy.yaml), not by code. Every action's result is kept,
+so a "block" no longer hides the "filescan" result that ran before it.
 """
 
-import json
-from typing import Dict, Any
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from agents.action_policy import ActionPolicy
+from memory.fingerprint import content_hash
+from utils.config import get_setting, resolve_path
+
+# action name -> label reported in "action_taken"
+ACTION_LABELS = {
+    "filescan": "filescan",
+    "block": "blocked",
+    "alert": "alerted",
+}
 
 
 class ActionAgent:
-    def __init__(self, tool_executor=None, memory_agent=None, logger=None):
+    def __init__(self, tool_executor=None, memory_agent=None, logger=None, policy: ActionPolicy = None):
         """
         tool_executor: object that exposes functions to run tools (filescan, code-exec, etc.)
         memory_agent: object for saving threat history/logs
         logger: logging utility
+        policy: ActionPolicy; defaults to the file named in settings.yaml (actions.policy_file)
         """
         self.tool_executor = tool_executor
         self.memory = memory_agent
         self.logger = logger
+        self.policy = policy or ActionPolicy(
+            resolve_path(get_setting("actions", "policy_file")),
+            known_actions=ACTION_LABELS,
+            logger=logger,
+        )
+        self.max_workers = int(get_setting("actions", "max_workers", 4))
+        # content hash -> (timestamp, result) for dedupe within the policy window,
+        # valid for one policy generation only
+        self._recent: Dict[str, Any] = {}
+        self._recent_generation = None
+        self._recent_lock = threading.Lock()
+
+    # -----------------------------
+    # Individual actions
+    # -----------------------------
+    def _run_tool(self, action: str, threat_info: Dict[str, Any]):
+        if action == "filescan" and self.tool_executor:
+            return self.tool_executor.run_filescan(threat_info)
+        return None
+
+    def _local_action(self, action: str, threat_info: Dict[str, Any]):
+        if action == "block":
+            return {"reason": f"{str(threat_info.get('severity')).capitalize()} severity threat blocked."}
+        if action == "alert":
+            return {"reason": f"Alert raised for {threat_info.get('threat_type')} from {threat_info.get('source')}."}
+        return None
 
     def execute_action(self, threat_info: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute action based on classified threat.
-        
+
         threat_info example:
         {
             "threat_type": "malware",
@@ -31,42 +75,88 @@ class ActionAgent:
             "metadata": {...}
         }
         """
-        threat_type = threat_info.get("threat_type")
-        severity = threat_info.get("severity")
-        source = threat_info.get("source")
+        return self.execute_actions([threat_info])[0]
 
-        # Logging the decision
-        if self.logger:
-            self.logger.log(f"[ActionAgent] Received threat: {json.dumps(threat_info)}")
+    def execute_actions(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute the policy for a batch of threats.
+        - identical threats (same content) within the policy's dedupe window
+          reuse the earlier result instead of running actions again
+        - tool actions (filescan) for different threats run concurrently
+        - all memory writes are committed in one bulk write
+        Returns one result per input, in order.
+        """
+        self.policy.reload()
+        now = time.time()
+        window = self.policy.dedupe_window_sec
 
-        result = {"action_taken": None, "details": {}}
+        results: List[Any] = [None] * len(batch)
+        pending: Dict[str, List[int]] = {}
+        with self._recent_lock:
+            if self._recent_generation != self.policy.generation:
+                # results decided by a replaced policy must not be reused
+                self._recent.clear()
+                self._recent_generation = self.policy.generation
+            # forget entries that fell out of the window
+            for h in [h for h, (ts, _) in self._recent.items() if now - ts > window]:
+                del self._recent[h]
+            for i, threat_info in enumerate(batch):
+                h = content_hash(threat_info)
+                cached = self._recent.get(h)
+                if cached is not None:
+                    results[i] = {**cached[1], "deduplicated": True}
+                elif h in pending:
+                    pending[h].append(i)
+                else:
+                    pending[h] = [i]
 
-        # -------------------------
-        # ACTION 1 — FILE SCAN
-        # -------------------------
-        if threat_type in ["malware", "suspicious_file"]:
-            if self.tool_executor:
-                scan_result = self.tool_executor.run_filescan(threat_info)
-                result["action_taken"] = "filescan"
-                result["details"] = scan_result
+        # plan: decide actions once per unique threat, submit tool work concurrently
+        plans = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for h, indexes in pending.items():
+                threat_info = batch[indexes[0]]
+                steps = []
+                for rule_id, action in self.policy.decide(threat_info):
+                    if action == "filescan":
+                        steps.append((rule_id, action, pool.submit(self._run_tool, action, threat_info)))
+                    else:
+                        steps.append((rule_id, action, self._local_action(action, threat_info)))
+                plans[h] = steps
 
-        # -------------------------
-        # ACTION 2 — BLOCK
-        # -------------------------
-        if severity == "high":
-            result["action_taken"] = "blocked"
-            result["details"] = {"reason": "High severity threat blocked."}
+        for h, steps in plans.items():
+            result = {"action_taken": None, "details": {}, "actions": []}
+            for rule_id, action, outcome in steps:
+                details = outcome.result() if isinstance(outcome, Future) else outcome
+                if details is None:
+                    continue
+                result["actions"].append({"action": ACTION_LABELS[action], "rule": rule_id, "details": details})
+                # the last action in policy order is the headline one
+                result["action_taken"] = ACTION_LABELS[action]
+                result["details"] = details
+            with self._recent_lock:
+                if window > 0:
+                    self._recent[h] = (now, result)
+            for i in pending[h]:
+                results[i] = result if i == pending[h][0] else {**result, "deduplicated": True}
 
         # -------------------------
-        # ACTION 3 — SAVE MEMORY
+        # SAVE MEMORY (bulk)
         # -------------------------
         if self.memory:
-            self.memory.store(threat_info)
+            if hasattr(self.memory, "save_many"):
+                self.memory.save_many(batch)
+            else:
+                for threat_info in batch:
+                    self.memory.store(threat_info)
 
         # -------------------------
-        # ACTION 4 — ALERT
+        # ALERT
         # -------------------------
         if self.logger:
-            self.logger.log(f"[ActionAgent] Action taken: {result}")
+            taken = [r["action_taken"] for r in results]
+            self.logger.log(
+                f"[ActionAgent] Processed {len(batch)} threat(s) "
+                f"({len(batch) - len(plans)} deduplicated), actions: {taken}"
+            )
 
-        return result
+        return results
@@ -0,0 +1,159 @@
+# action_policy.py
+"""
+Declarative action policy for ActionAgent.
+
+Rules live in a YAML/JSON file (config/action_policy.yaml by default):
+
+    rules:
+      - id: block-high-severity
+        match: {severity: [high]}
+        actions: [block]
+
+The rule list is compiled into an index keyed on each matched field value,
+and decisions are memoized per (threat_type, severity, source), so deciding
+is a dict lookup for every threat shape after the first. The file is
+re-read when its mtime changes, so policy edits need no code change or
+restart.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+try:
+    import yaml
+    HAS_YAML = True
+except Exception:
+    HAS_YAML = False
+
+MATCH_FIELDS = ("threat_type", "severity", "source")
+
+# used when no policy file is configured or it cannot be read
+DEFAULT_POLICY = {
+    "version": 1,
+    "dedupe_window_sec": 60,
+    "rules": [
+        {"id": "scan-suspicious-files", "match": {"threat_type": ["malware", "suspicious_file"]}, "actions": ["filescan"]},
+        {"id": "block-high-severity", "match": {"severity": ["high"]}, "actions": ["block"]},
+    ],
+}
+
+
+class PolicyError(ValueError):
+    pass
+
+
+class ActionPolicy:
+    def __init__(self, path: str = None, known_actions=None, logger=None):
+        self.path = path
+        self.known_actions = set(known_actions or [])
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.version = None
+        # bumped on every install, even if the file keeps its "version"
+        self.generation = 0
+        self.dedupe_window_sec = 0.0
+        self._rules: List[Dict[str, Any]] = []
+        self._index: Dict[Tuple[str, Any], set] = {}
+        self._decisions: Dict[Tuple, Tuple[Tuple[str, str], ...]] = {}
+        self.reload(force=True)
+
+    # -----------------------------
+    # Loading & compiling
+    # -----------------------------
+    def _read(self) -> Dict[str, Any]:
+        if not self.path or not os.path.exists(self.path):
+            return DEFAULT_POLICY
+        with open(self.path, "r", encoding="utf-8") as f:
+            if self.path.endswith(".json"):
+                return json.load(f)
+            if not HAS_YAML:
+                raise PolicyError("PyYAML is required for YAML policy files")
+            return yaml.safe_load(f) or {}
+
+    def _compile(self, policy: Dict[str, Any]):
+        rules = policy.get("rules")
+        if not isinstance(rules, list):
+            raise PolicyError("policy must define a list of rules")
+        compiled = []
+        index: Dict[Tuple[str, Any], set] = {}
+        for pos, rule in enumerate(rules):
+            rule_id = rule.get("id") or f"rule-{pos}"
+            actions = rule.get("actions") or []
+            unknown = [a for a in actions if self.known_actions and a not in self.known_actions]
+            if unknown:
+                raise PolicyError(f"rule {rule_id}: unknown actions {unknown}")
+            match = {}
+            for field, values in (rule.get("match") or {}).items():
+                if field not in MATCH_FIELDS:
+                    raise PolicyError(f"rule {rule_id}: cannot match on '{field}'")
+                match[field] = set(values if isinstance(values, list) else [values])
+            compiled.append({"id": rule_id, "match": match, "actions": tuple(actions)})
+            if not match:
+                index.setdefault(("*", None), set()).add(pos)
+            for field, values in match.items():
+                for v in values:
+                    index.setdefault((field, v), set()).add(pos)
+        return compiled, index
+
+    def reload(self, force: bool = False) -> bool:
+        """Re-read the policy file if it changed. Returns True if a new policy was installed."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            mtime = None
+        if not force and mtime == self._mtime:
+            return False
+        try:
+            policy = self._read()
+            rules, index = self._compile(policy)
+        except Exception as e:
+            # keep serving the previous policy on a bad edit
+            if self.logger:
+                self.logger.log(f"[ActionPolicy] Rejected policy {self.path}: {e}")
+            if self._rules:
+                self._mtime = mtime
+                return False
+            rules, index = self._compile(DEFAULT_POLICY)
+            policy = DEFAULT_POLICY
+        with self._lock:
+            self._rules, self._index = rules, index
+            self._decisions = {}
+            self._mtime = mtime
+            self.version = policy.get("version")
+            self.generation += 1
+            self.dedupe_window_sec = float(policy.get("dedupe_window_sec", 0) or 0)
+        if self.logger:
+            self.logger.log(f"[ActionPolicy] Loaded {len(rules)} rules (version={self.version})")
+        return True
+
+    # -----------------------------
+    # Decisions
+    # -----------------------------
+    def decide(self, threat_info: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        """Ordered (rule_id, action) pairs for a threat, without duplicates."""
+        key = tuple(threat_info.get(f) for f in MATCH_FIELDS)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            return decision
+        with self._lock:
+            rules, index = self._rules, self._index
+        # candidate rules: those indexed on one of our values, plus match-anything rules
+        candidates = set(index.get(("*", None), ()))
+        for field, value in zip(MATCH_FIELDS, key):
+            candidates |= index.get((field, value), set())
+        decision, seen = [], set()
+        for pos in sorted(candidates):
+            rule = rules[pos]
+            if all(value in rule["match"].get(field, (value,)) for field, value in zip(MATCH_FIELDS, key)):
+                for action in rule["actions"]:
+                    if action not in seen:
+                        seen.add(action)
+                        decision.append((rule["id"], action))
+        decision = tuple(decision)
+        with self._lock:
+            if rules is self._rules:
+                self._decisions[key] = decision
+        return decision
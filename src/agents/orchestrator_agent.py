@@ -7,6 +7,11 @@ Wires together:
  - Tools (FileScan Tool / System Hardener)
  - Logger
 Provides a single `run()` that demonstrates an example pipeline.
+
+Report modes:
+ - "full":  legacy report with the whole memory snapshot and every log line
+ - "run":   only the records and log lines produced by this run, plus a summary
+ - "delta": every record added after the `since` cursor, plus a summary
 """
 
 # Use imports that match the repository layout (src is the package root when run correctly).
@@ -21,13 +26,18 @@ from tools.filescan import ToolExecutor as FileToolExecutor
 from tools.system_hardener import HardeningExecutor
 
 class OrchestratorAgent:
-    def __init__(self):
+    def __init__(self, memory: MemoryBank = None):
+        """
+        memory: MemoryBank to use (e.g. a process-wide shared one); when
+        omitted the orchestrator opens its own and close() releases it.
+        """
         # Core infra
         self.logger = ThreatLogger(store_in_memory=True)
-        self.memory = MemoryBank()
+        self._owns_memory = memory is None
+        self.memory = memory or MemoryBank()
 
         # Tools
-        self.file_tool = FileToolExecutor(logger=self.logger)    # filescan.ToolExecutor
+        self.file_tool = FileToolExecutor(logger=self.logger, memory=self.memory)    # filescan.ToolExecutor
         self.hardener = HardeningExecutor(logger=self.logger)    # system_hardener.HardeningExecutor
 
         # Agents
@@ -40,15 +50,23 @@ class OrchestratorAgent:
 
         self.logger.log("🧠 Orchestrator initialized with agents & tools.")
 
-    def run_demo_pipeline(self):
+    def run_demo_pipeline(self, report_mode: str = "full", since: int = None, lazy: bool = False):
         """
         Run a short demo pipeline illustrating:
          1) file analysis
          2) threat classification result
          3) action execution
          4) memory & logs
+
+        report_mode: "full", "run" or "delta" (see module docstring)
+        since: memory cursor for "delta" mode (defaults to the start of this run)
+        lazy: return memory records as a generator (for StreamingReportWriter)
         """
+        if report_mode not in ("full", "run", "delta"):
+            raise ValueError(f"Unknown report_mode: {report_mode}")
 
+        run_cursor = self.memory.cursor()
+        log_mark = self.logger.mark()
         self.logger.log("🔄 Starting demo pipeline...")
 
         # Example 1: File scan flow
@@ -126,19 +144,44 @@ class OrchestratorAgent:
         })
 
 
+        self.logger.log("✅ Demo pipeline finished.")
+
         # Final report assembly
         final_report = {
             "file_scan": file_result,
             "file_action": action_result,
             "system_scan": system_scan_result,
             "hardening": hardening_result,
-            "memory_snapshot": self.memory.export_memory(),
-            "logs": self.logger.get_logs()
         }
 
-        self.logger.log("✅ Demo pipeline finished.")
+        if report_mode == "full":
+            final_report["memory_snapshot"] = self.memory.export_memory()
+            final_report["logs"] = self.logger.get_logs()
+            return final_report
+
+        start = run_cursor if report_mode == "run" or since is None else since
+        end = self.memory.cursor()
+        records = self.memory.iter_since(start)
+        final_report["summary"] = {
+            "report_mode": report_mode,
+            "file_issues": file_result.get("detected_issues"),
+            "file_action": action_result.get("action_taken"),
+            "system_health": system_scan_result.get("system_health"),
+            "hardening_status": hardening_result.get("hardening_status"),
+        }
+        final_report["memory_delta"] = {
+            "cursor_start": start,
+            "cursor_end": end,
+            "records": records if lazy else list(records),
+        }
+        final_report["logs"] = self.logger.get_logs(since=log_mark)
         return final_report
 
+    def close(self):
+        """Release the MemoryBank's files if this orchestrator opened it."""
+        if self._owns_memory:
+            self.memory.close()
+
     # backwards-compatibility: keep run() entry
-    def run(self):
-        return self.run_demo_pipeline()
+    def run(self, report_mode: str = "full", since: int = None, lazy: bool = False):
+        return self.run_demo_pipeline(report_mode=report_mode, since=since, lazy=lazy)
@@ -1,22 +1,40 @@
 """
 Entry point for ThreatGuard.
 This script initializes the OrchestratorAgent and runs the demo pipeline.
+
+Environment:
+ - THREATGUARD_REPORT_MODE: "run" (default), "delta" or "full"
+ - THREATGUARD_REPORT_SINCE: memory cursor for "delta" mode
+ - THREATGUARD_PROFILE: "1" to profile the run (cProfile + tracemalloc,
+   written to logs/, summary added to the report as "profile")
 """
 
+import os
+
 from agents.orchestrator_agent import OrchestratorAgent
+from utils.profiler import profile_run, profiling_requested
+from utils.report_writer import StreamingReportWriter
 
 def main():
-    orchestrator = OrchestratorAgent()
-    report = orchestrator.run()
+    report_mode = os.environ.get("THREATGUARD_REPORT_MODE", "run")
+    since = os.environ.get("THREATGUARD_REPORT_SINCE")
+    since = int(since) if since else None
+
+    with profile_run(profiling_requested(os.environ.get("THREATGUARD_PROFILE")), "main") as prof:
+        orchestrator = OrchestratorAgent()
+        report = orchestrator.run(report_mode=report_mode, since=since, lazy=True)
+    if prof.summary:
+        report["profile"] = prof.summary
 
     # Optional: write final report to file for Kaggle / GitHub evidence
     try:
-        import json
-        with open("threatguard_run_report.json", "w") as fh:
-            json.dump(report, fh, indent=2)
+        StreamingReportWriter("threatguard_run_report.json").write(report)
         print("✅ ThreatGuard demo report written to threatguard_run_report.json")
     except Exception as e:
         print("⚠️ Could not write report file:", str(e))
+    finally:
+        # the lazy report reads memory while it is written, close afterwards
+        orchestrator.close()
 
     # Print a short summary to console
     print("\n--- ThreatGuard Demo Summary ---")
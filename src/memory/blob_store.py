@@ -0,0 +1,90 @@
+# src/memory/blob_store.py
+"""
+Content-addressed blob store for large MemoryBank payloads.
+
+Long strings (file contents, raw LLM output) are written once under
+<dir>/<sha[:2]>/<sha> and replaced inside records by {"$blob": sha}.
+Identical content is therefore stored a single time no matter how many
+records reference it. Raw bytes (binary uploads) cannot be stored as JSON
+at all, so they always become blobs: {"$blob": sha, "encoding": "bytes"}.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Any
+
+# strings longer than this are moved out of the record into a blob
+BLOB_THRESHOLD = 512
+
+
+class BlobStore:
+    def __init__(self, root: str, threshold: int = BLOB_THRESHOLD, logger=None):
+        self.root = root
+        self.threshold = threshold
+        self.logger = logger
+        self._known = set()
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data) -> str:
+        raw = bytes(data) if isinstance(data, (bytes, bytearray, memoryview)) else data.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            if digest in self._known:
+                return digest
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".blobtmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(raw)
+                os.replace(tmp_path, path)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except Exception:
+                    pass
+                raise
+        with self._lock:
+            self._known.add(digest)
+        return digest
+
+    def get(self, digest: str) -> str:
+        with open(self._path(digest), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def get_bytes(self, digest: str) -> bytes:
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+
+    # Replace long strings inside obj with blob references
+    def externalize(self, obj: Any) -> Any:
+        if isinstance(obj, str) and len(obj) > self.threshold:
+            return {"$blob": self.put(obj)}
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return {"$blob": self.put(obj), "encoding": "bytes"}
+        if isinstance(obj, dict):
+            return {k: self.externalize(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.externalize(v) for v in obj]
+        return obj
+
+    # Inverse of externalize(); missing blobs are left as references
+    def resolve(self, obj: Any) -> Any:
+        if isinstance(obj, dict):
+            if "$blob" in obj and set(obj) <= {"$blob", "encoding"}:
+                try:
+                    if obj.get("encoding") == "bytes":
+                        return self.get_bytes(obj["$blob"])
+                    return self.get(obj["$blob"])
+                except OSError:
+                    return obj
+            return {k: self.resolve(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.resolve(v) for v in obj]
+        return obj
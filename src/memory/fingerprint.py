@@ -0,0 +1,68 @@
+# src/memory/fingerprint.py
+"""
+Finding fingerprints for ThreatGuard memory.
+
+A fingerprint identifies "the same finding seen again": it is built from
+the category, the source and a hash of the finding content. Volatile
+fields (timestamps, durations) and results derived from memory (similar
+threats) are dropped before hashing so that a repeated scan with
+identical results maps to the same fingerprint.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Tuple
+
+# keys whose values change on every run and must not affect the fingerprint;
+# similar_threats is derived from memory itself (it grows as threats are saved)
+VOLATILE_KEYS = {"ts", "seq", "timestamp", "duration_sec", "similar_threats"}
+
+
+def strip_volatile(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return {k: strip_volatile(v) for k, v in obj.items() if k not in VOLATILE_KEYS}
+    if isinstance(obj, list):
+        return [strip_volatile(v) for v in obj]
+    return obj
+
+
+def _canonical_default(obj: Any) -> Any:
+    # raw uploads hash by content instead of by their (large) repr
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return {"$bytes": hashlib.sha256(obj).hexdigest()}
+    return str(obj)
+
+
+def content_hash(obj: Any) -> str:
+    canonical = json.dumps(strip_volatile(obj), sort_keys=True, ensure_ascii=False,
+                           separators=(",", ":"), default=_canonical_default)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def describe(section: str, payload: Any) -> Tuple[str, str]:
+    """Best-effort (category, source) for a payload saved into `section`."""
+    if not isinstance(payload, dict):
+        return section, "unknown"
+    info = payload.get("threat_info") or payload.get("system_threat_info") or payload
+    category = (
+        payload.get("type")
+        or (info.get("threat_type") if isinstance(info, dict) else None)
+        or section
+    )
+    source = (info.get("source") if isinstance(info, dict) else None) or "unknown"
+    return str(category), str(source)
+
+
+def fingerprint(category: str, source: str, digest: str) -> str:
+    return hashlib.sha256(f"{category}|{source}|{digest}".encode("utf-8")).hexdigest()
+
+
+def fingerprint_payload(section: str, payload: Any) -> Dict[str, str]:
+    category, source = describe(section, payload)
+    digest = content_hash(payload)
+    return {
+        "fingerprint": fingerprint(category, source, digest),
+        "category": category,
+        "source": source,
+        "content_hash": digest,
+    }
@@ -0,0 +1,116 @@
+# src/memory/journal.py
+"""
+Append-only change journal shared by every process using the same MemoryBank.
+
+Each change is one line of compact JSON carrying the global sequence number
+it was assigned. Writers append under an exclusive flock on a sidecar lock
+file; readers take a shared lock and only read the bytes added since their
+last offset, so keeping a per-process cache current costs O(new changes).
+
+When the journal is folded into a snapshot it is truncated and a generation
+counter kept in the lock file is bumped; readers that see a new generation
+re-map the snapshot and start reading the journal from the beginning.
+"""
+
+import json
+import os
+import struct
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except Exception:
+    # no cross-process locking available (e.g. Windows): single process only
+    HAS_FCNTL = False
+
+GENERATION = struct.Struct("<Q")
+
+
+class Journal:
+    def __init__(self, path: str, lock_path: str, fsync: bool = True):
+        self.path = path
+        self.lock_path = lock_path
+        self.fsync = fsync
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._fh = os.fdopen(fd, "rb+", buffering=0)
+        self._generation = None
+        self._offset = 0
+
+    @contextmanager
+    def locked(self, exclusive: bool):
+        if HAS_FCNTL:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _read_generation(self) -> int:
+        raw = os.pread(self._lock_fd, GENERATION.size, 0)
+        return GENERATION.unpack(raw)[0] if len(raw) == GENERATION.size else 0
+
+    def read_new(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Return (entries appended since the last call, rotated). `rotated` is
+        True when the journal was compacted since it was last read, i.e.
+        its previous contents now live in the snapshot.
+        Caller holds the lock (shared or exclusive).
+        """
+        generation = self._read_generation()
+        rotated = self._generation is not None and generation != self._generation
+        if generation != self._generation:
+            self._generation = generation
+            self._offset = 0
+
+        size = os.fstat(self._fh.fileno()).st_size
+        if size <= self._offset:
+            return [], rotated
+        self._fh.seek(self._offset)
+        data = self._fh.read(size - self._offset)
+        end = data.rfind(b"\n") + 1
+        # ignore a trailing partial line from a writer that died mid-append
+        self._offset += end
+        entries = []
+        for line in data[:end].splitlines():
+            if line:
+                entries.append(json.loads(line))
+        return entries, rotated
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Append one entry. Caller holds the exclusive lock and has read_new() first."""
+        self.append_many([entry])
+
+    def append_many(self, entries: List[Dict[str, Any]]) -> None:
+        """Append entries with a single write (and fsync)."""
+        if not entries:
+            return
+        data = b"".join(
+            json.dumps(e, ensure_ascii=False, separators=(",", ":"), default=list).encode("utf-8") + b"\n"
+            for e in entries
+        )
+        self._fh.write(data)
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+        self._offset += len(data)
+
+    def size(self) -> int:
+        return os.fstat(self._fh.fileno()).st_size
+
+    def rotate(self) -> None:
+        """Empty the journal and bump the generation. Caller holds the exclusive lock."""
+        os.ftruncate(self._fh.fileno(), 0)
+        self._generation = self._read_generation() + 1
+        os.pwrite(self._lock_fd, GENERATION.pack(self._generation), 0)
+        self._offset = 0
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -5,39 +5,81 @@ MemoryBank - persistent memory for ThreatGuard
 Features:
 - Loads memory from disk if present
 - Auto-creates data directory and memory file
-- Thread-safe in-memory store with atomic JSON writes
+- Thread- and process-safe: writes go through a shared append-only journal
+  under a file lock, and each process refreshes its cache from the journal
+  incrementally (see memory/journal.py)
 - Provides legacy-compatible API:
     - save(data)
     - store(data)
+    - save_many(items)
     - save_threat(payload)
     - save_hardening(payload)
     - export_memory() -> dict
     - get_all() -> list
+    - close()
+- Every record carries a monotonically increasing `seq`, so callers can take
+  a cursor() and later read only the records added after it (iter_since).
+- Findings are fingerprinted (category + source + content hash). A repeat
+  only bumps count / last_seen on its aggregate in "findings" instead of
+  appending a new record, and long strings are stored once as
+  content-addressed blobs next to the memory file.
+- annotate_findings(section, fn) stores derived fields (e.g. a similarity
+  signature) on new finding aggregates; iter_findings() walks them.
+- Persists to a compact indexed snapshot (memory_bank.snap, see
+  memory/snapshot.py) that is memory-mapped on startup; records are only
+  decoded when accessed. Finding aggregates are stored sorted by
+  fingerprint and looked up one at a time by binary search, so only the
+  aggregates changed since the snapshot are held in memory. A legacy
+  memory_bank.json is imported once.
+  The journal is folded into the snapshot once it exceeds COMPACT_BYTES.
 """
 
+import heapq
 import json
 import os
 import threading
 import time
 import tempfile
+from contextlib import contextmanager
+
+from memory.blob_store import BlobStore
+from memory.fingerprint import fingerprint_payload
+from memory.journal import Journal
+from memory.snapshot import LazyRecords, SnapshotReader, merge_keyed, write_snapshot
 
 DATA_DIR = os.path.join(os.getcwd(), "data")
 MEMORY_FILE = os.path.join(DATA_DIR, "memory_bank.json")
 
+SECTIONS = ("threats", "hardening", "events")
+
+# fold the journal into the snapshot once it grows past this size
+COMPACT_BYTES = 4 * 1024 * 1024
+
 
 class MemoryBank:
-    def __init__(self, logger=None, file_path: str = None):
+    def __init__(self, logger=None, file_path: str = None, use_snapshot: bool = True):
         self.logger = logger
         self._lock = threading.Lock()
         self._storage = {
             "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            "threats": [],
-            "hardening": [],
-            "events": [],
+            "threats": LazyRecords(),
+            "hardening": LazyRecords(),
+            "events": LazyRecords(),
+            "seq": 0,
+            "findings": {},
         }
+        # snapshot holding the keyed "findings" section; _storage["findings"]
+        # only holds aggregates changed after it was written
+        self._findings_reader = None
+        # currently mapped snapshot, released on re-map and close()
+        self._reader = None
+        # section -> fn(payload) -> dict of extra fields for new finding aggregates
+        self._annotators = {}
 
         # allow override for tests / custom path
         self.file_path = file_path or MEMORY_FILE
+        self.use_snapshot = use_snapshot
+        self.snapshot_path = os.path.splitext(self.file_path)[0] + ".snap"
 
         # ensure data directory exists
         try:
@@ -46,8 +88,20 @@ class MemoryBank:
             # best-effort; not fatal
             pass
 
-        # try to load existing memory
-        self._load_from_disk()
+        self.blobs = BlobStore(os.path.join(os.path.dirname(self.file_path), "blobs"), logger=logger)
+
+        # shared change journal (snapshot mode only; JSON mode is single-process)
+        base = os.path.splitext(self.file_path)[0]
+        self._journal = Journal(base + ".journal", base + ".lock") if use_snapshot else None
+
+        # try to load existing memory (under the shared lock so a concurrent
+        # compaction cannot swap the snapshot between load and journal replay)
+        if self._journal is None:
+            self._load_from_disk()
+        else:
+            with self._journal.locked(exclusive=False):
+                self._load_from_disk()
+                self._sync()
 
         if self.logger:
             self.logger.log(f"[MemoryBank] Initialized. file={self.file_path}")
@@ -71,29 +125,122 @@ class MemoryBank:
             raise
 
     def _load_from_disk(self):
+        if self.use_snapshot and os.path.exists(self.snapshot_path):
+            try:
+                self._attach_snapshot(SnapshotReader(self.snapshot_path))
+                if self.logger:
+                    self.logger.log(f"[MemoryBank] Mapped snapshot {self.snapshot_path}")
+                return
+            except Exception as e:
+                if self.logger:
+                    self.logger.log(f"[MemoryBank] Failed to map snapshot, trying JSON: {e}")
         try:
             if os.path.exists(self.file_path):
                 with open(self.file_path, "r", encoding="utf-8") as f:
                     data = json.load(f)
                     # merge safe: keep expected keys
                     if isinstance(data, dict):
-                        for k in ("threats", "hardening", "events"):
+                        for k in SECTIONS:
                             if k in data and isinstance(data[k], list):
-                                self._storage[k] = data[k]
+                                self._storage[k] = LazyRecords(tail=data[k])
                         # copy other keys too if desired
                         for k, v in data.items():
                             if k not in self._storage:
                                 self._storage[k] = v
+                        if isinstance(data.get("seq"), int):
+                            self._storage["seq"] = data["seq"]
+                        if isinstance(data.get("findings"), dict):
+                            self._storage["findings"] = data["findings"]
                         if self.logger:
                             self.logger.log(f"[MemoryBank] Loaded memory from {self.file_path}")
         except Exception as e:
             if self.logger:
                 self.logger.log(f"[MemoryBank] Failed to load memory: {e}")
 
+    # Internal: point every section at a freshly mapped snapshot
+    def _attach_snapshot(self, reader: SnapshotReader):
+        # every record view is rebuilt below, nothing refers to the old mapping afterwards
+        if self._reader is not None and self._reader is not reader:
+            self._reader.close()
+        self._reader = reader
+        for k, v in reader.meta.items():
+            self._storage[k] = v
+        for k in SECTIONS:
+            self._storage[k] = LazyRecords(reader, k)
+        if reader.is_keyed("findings"):
+            self._findings_reader = reader
+            self._storage["findings"] = {}
+        else:
+            # older snapshot without a key table: decode once, keyed at the next compaction
+            self._findings_reader = None
+            self._storage["findings"] = {agg["fingerprint"]: agg for agg in LazyRecords(reader, "findings")}
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """
+        Hold the thread lock and the cross-process journal lock, with the
+        local cache caught up to the latest journal entry.
+        """
+        with self._lock:
+            if self._journal is None:
+                yield
+                return
+            with self._journal.locked(exclusive):
+                self._sync()
+                yield
+
+    # Internal: replay journal entries written by any process (caller holds the locks)
+    def _sync(self):
+        entries, rotated = self._journal.read_new()
+        if rotated and os.path.exists(self.snapshot_path):
+            # another process compacted: everything so far is in the snapshot
+            self._attach_snapshot(SnapshotReader(self.snapshot_path))
+        for entry in entries:
+            self._apply(entry)
+
+    def _apply(self, entry: dict):
+        # entries already folded into the snapshot (or applied) are skipped
+        if entry["seq"] <= self._storage.get("seq", 0):
+            return
+        if "record" in entry:
+            self._storage[entry["section"]].append(entry["record"])
+        agg = entry["finding"]
+        findings = self._storage["findings"]
+        findings.pop(agg["fingerprint"], None)
+        # re-insert so dict order follows last update (used by iter_since)
+        findings[agg["fingerprint"]] = agg
+        self._storage["seq"] = entry["seq"]
+
+    # Internal: aggregate for one fingerprint, in memory or in the snapshot (caller holds the lock)
+    def _finding(self, fingerprint: str):
+        agg = self._storage["findings"].get(fingerprint)
+        reader = self._findings_reader
+        if agg is None and reader is not None:
+            i = reader.find("findings", bytes.fromhex(fingerprint))
+            if i is not None:
+                agg = reader.record("findings", i)
+        return agg
+
+    # Internal: every aggregate, decoded (caller holds the lock)
+    def _all_findings(self) -> dict:
+        merged = {}
+        if self._findings_reader is not None:
+            for i in range(self._findings_reader.count("findings")):
+                agg = self._findings_reader.record("findings", i)
+                merged[agg["fingerprint"]] = agg
+        merged.update(self._storage["findings"])
+        return merged
+
     def _flush_to_disk(self):
+        if self.use_snapshot:
+            # records are durable once journaled; only compact when it grows
+            if self._journal.size() < COMPACT_BYTES and os.path.exists(self.snapshot_path):
+                return
+            self.compact()
+            return
         with self._lock:
             try:
-                raw = json.dumps(self._storage, indent=2, ensure_ascii=False)
+                raw = json.dumps(self._storage, indent=2, ensure_ascii=False, default=list)
                 self._atomic_write(self.file_path, raw)
                 if self.logger:
                     self.logger.log(f"[MemoryBank] Flushed memory to disk ({self.file_path})")
@@ -101,12 +248,84 @@ class MemoryBank:
                 if self.logger:
                     self.logger.log(f"[MemoryBank] Error writing memory to disk: {e}")
 
+    def compact(self):
+        """Fold the journal into a new snapshot and start an empty journal."""
+        if not self.use_snapshot:
+            return self._flush_to_disk()
+        with self._locked(exclusive=True):
+            try:
+                meta = {k: v for k, v in self._storage.items() if k not in SECTIONS and k != "findings"}
+                sections = {k: self._storage[k] for k in SECTIONS}
+                updates = {bytes.fromhex(fp): agg for fp, agg in self._storage["findings"].items()}
+                keyed = {"findings": merge_keyed(self._findings_reader, "findings", updates)}
+                write_snapshot(self.snapshot_path, meta, sections, keyed=keyed)
+                self._journal.rotate()
+                # re-map so appended records and changed aggregates move into the snapshot
+                self._attach_snapshot(SnapshotReader(self.snapshot_path))
+                if self.logger:
+                    self.logger.log(f"[MemoryBank] Compacted memory into {self.snapshot_path}")
+            except Exception as e:
+                if self.logger:
+                    self.logger.log(f"[MemoryBank] Error writing memory to disk: {e}")
+
+    def _append(self, section: str, key: str, payload) -> bool:
+        """
+        Append payload to `section` unless an identical finding was seen
+        before, in which case only its aggregate is updated.
+        Returns True if a new record was appended.
+        """
+        return self._append_many(section, key, [payload])[0]
+
+    def _append_many(self, section: str, key: str, payloads) -> list:
+        """Bulk _append: one lock round-trip and one journal write for the batch."""
+        now = time.time()
+        fps = [fingerprint_payload(section, p) for p in payloads]
+        with self._lock:
+            known = [self._finding(fp["fingerprint"]) is not None for fp in fps]
+            annotate = self._annotators.get(section)
+        # blob writes and annotations happen outside the lock; both are idempotent
+        stored = [None if k else self.blobs.externalize(p) for k, p in zip(known, payloads)]
+        notes = [None if k or annotate is None else annotate(p) for k, p in zip(known, payloads)]
+
+        appended = []
+        with self._locked(exclusive=True):
+            entries = []
+            for fp, payload, pre, note in zip(fps, payloads, stored, notes):
+                seq = self._storage.get("seq", 0) + 1
+                agg = self._finding(fp["fingerprint"])
+                if agg is not None:
+                    entry = {"seq": seq, "finding": {**agg, "count": agg["count"] + 1, "last_seen": now, "seq": seq}}
+                else:
+                    entry = {
+                        "seq": seq,
+                        "section": section,
+                        "record": {
+                            "ts": now,
+                            "seq": seq,
+                            "fingerprint": fp["fingerprint"],
+                            key: pre if pre is not None else self.blobs.externalize(payload),
+                        },
+                        "finding": {
+                            **fp,
+                            **(note if note is not None else annotate(payload) if annotate else {}),
+                            "origin": section,
+                            "count": 1,
+                            "first_seen": now,
+                            "last_seen": now,
+                            "seq": seq,
+                        },
+                    }
+                # apply as we go so repeats inside the batch aggregate correctly
+                self._apply(entry)
+                entries.append(entry)
+                appended.append(agg is None)
+            if self._journal is not None:
+                self._journal.append_many(entries)
+        return appended
+
     # Generic save: append to "events"
     def save(self, data):
-        with self._lock:
-            self._storage.setdefault("events", []).append(
-                {"ts": time.time(), "payload": data}
-            )
+        self._append("events", "payload", data)
         # write out async-safe immediate flush
         self._flush_to_disk()
         return True
@@ -115,35 +334,169 @@ class MemoryBank:
     def store(self, data):
         return self.save(data)
 
+    # bulk save into "events" with a single journal write
+    def save_many(self, items):
+        self._append_many("events", "payload", list(items))
+        self._flush_to_disk()
+        return True
+
     # specific helper for threats
     def save_threat(self, payload: dict):
-        with self._lock:
-            self._storage.setdefault("threats", []).append(
-                {"ts": time.time(), "threat": payload}
-            )
+        self._append("threats", "threat", payload)
         self._flush_to_disk()
         return True
 
     # specific helper for hardening records
     def save_hardening(self, payload: dict):
-        with self._lock:
-            self._storage.setdefault("hardening", []).append(
-                {"ts": time.time(), "hardening": payload}
-            )
+        self._append("hardening", "hardening", payload)
         self._flush_to_disk()
         return True
 
-    # Export full snapshot (safe copy)
-    def export_memory(self):
+    def annotate_findings(self, section: str, fn):
+        """
+        Register fn(payload) -> dict for `section`; its fields are stored on
+        the aggregate of every new finding saved there (e.g. the
+        SimilarityIndex signature), so readers need not rebuild them.
+        """
         with self._lock:
-            return json.loads(json.dumps(self._storage))
+            self._annotators[section] = fn
+
+    # aggregate for one fingerprint (count, first_seen, last_seen, ...)
+    def get_finding(self, fingerprint: str):
+        with self._locked(exclusive=False):
+            agg = self._finding(fingerprint)
+            return dict(agg) if agg else None
+
+    def close(self):
+        """Release the journal, its lock file and the snapshot mapping. The bank is unusable afterwards."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    # expand {"$blob": sha} references back into their content
+    def resolve(self, record):
+        return self.blobs.resolve(record)
+
+    # Export full snapshot (safe copy); decodes every record
+    def export_memory(self):
+        with self._locked(exclusive=False):
+            storage = dict(self._storage, findings=self._all_findings())
+            return json.loads(json.dumps(storage, default=list))
 
     # get all events/threats
     def get_all(self):
-        with self._lock:
-            return json.loads(json.dumps(self._storage))
+        return self.export_memory()
 
     # convenience: direct access to threats list (read-only copy)
     def get_threats(self):
-        with self._lock:
-            return json.loads(json.dumps(self._storage.get("threats", [])))
+        with self._locked(exclusive=False):
+            return json.loads(json.dumps(self._storage.get("threats", []), default=list))
+
+    def iter_findings(self, origin: str = None):
+        """
+        Yield every finding aggregate, or only those first saved into
+        section `origin`. Aggregates are decoded one at a time outside the
+        lock, from the snapshot pinned when iteration started.
+        """
+        with self._locked(exclusive=False):
+            reader = self._findings_reader
+            if reader is not None:
+                reader.pin()
+            changed = [dict(agg) for agg in self._storage["findings"].values()]
+        try:
+            for agg in changed:
+                if origin is None or agg.get("origin") == origin:
+                    yield agg
+            if reader is not None:
+                dirty = {agg["fingerprint"] for agg in changed}
+                for i in range(reader.count("findings")):
+                    if reader.key("findings", i).hex() in dirty:
+                        continue
+                    agg = reader.record("findings", i)
+                    if origin is None or agg.get("origin") == origin:
+                        yield agg
+        finally:
+            if reader is not None:
+                reader.unpin()
+
+    # current position in the record sequence; pass to iter_since() later
+    def cursor(self) -> int:
+        with self._locked(exclusive=False):
+            return self._storage.get("seq", 0)
+
+    def iter_since(self, cursor: int = 0, sections=None):
+        """
+        Yield records added after `cursor`, oldest first, each tagged with
+        its section ("threats", "hardening" or "events"). Repeats of a known
+        finding are yielded as its updated aggregate (section "findings").
+        Records written before sequence numbers existed count as seq 0.
+        sections: optional subset of the above to read; the others are not
+        touched at all.
+
+        Only record positions are collected under the lock; each record is
+        decoded as it is yielded, from the snapshot that was current when
+        iteration started (pinned until the generator finishes).
+        """
+        wanted = set(SECTIONS + ("findings",) if sections is None else sections)
+        with self._locked(exclusive=False):
+            reader = self._reader
+            if reader is not None:
+                reader.pin()
+            # records are append-only, so (view, start, end) is a stable span
+            spans = {}
+            for section in SECTIONS:
+                if section in wanted:
+                    records = self._storage[section]
+                    spans[section] = (records, records.bisect_seq(cursor), len(records))
+            repeats = []
+            changed = self._storage["findings"] if "findings" in wanted else {}
+            # in-memory aggregates are ordered by last update
+            for agg in reversed(changed.values()):
+                if agg.get("seq", 0) <= cursor:
+                    break
+                if agg.get("count", 1) > 1:
+                    repeats.append((agg["seq"], "findings", dict(agg)))
+            findings_reader = self._findings_reader if "findings" in wanted else None
+            if findings_reader is not None:
+                # the index carries each aggregate's seq and the key table its
+                # fingerprint, so nothing is decoded here
+                for i, (_, _, seq) in enumerate(findings_reader.entries("findings")):
+                    if seq > cursor and findings_reader.key("findings", i).hex() not in changed:
+                        repeats.append((seq, "findings", i))
+            repeats.sort(key=lambda t: t[0])
+
+        def positions(section):
+            records, first, last = spans[section]
+            for i in range(first, last):
+                yield records.seq_at(i), section, i
+
+        try:
+            streams = [positions(section) for section in spans] + [repeats]
+            for _, section, pos in heapq.merge(*streams, key=lambda t: t[0]):
+                if section != "findings":
+                    yield {"section": section, **spans[section][0][pos]}
+                    continue
+                agg = pos if isinstance(pos, dict) else findings_reader.record("findings", pos)
+                if agg.get("count", 1) > 1:
+                    yield {"section": "findings", **agg}
+        finally:
+            if reader is not None:
+                reader.unpin()
+
+
+_shared_banks = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_memory_bank(file_path: str = None, logger=None) -> MemoryBank:
+    """One MemoryBank per memory file and process, for long-running workers (API)."""
+    path = os.path.abspath(file_path or MEMORY_FILE)
+    with _shared_lock:
+        bank = _shared_banks.get(path)
+        if bank is None:
+            bank = MemoryBank(logger=logger, file_path=path)
+            _shared_banks[path] = bank
+        return bank
@@ -0,0 +1,282 @@
+# src/memory/snapshot.py
+"""
+Compact indexed snapshot format for MemoryBank.
+
+Layout (all integers little-endian):
+
+    MAGIC
+    record bytes ...                 compact JSON, one record after another
+    index for each section           count x (offset u64, length u32, seq u64)
+    key table for keyed sections     count x 32-byte key, sorted
+    header                           compact JSON: meta + section table
+    footer                           header offset u64, header length u64, MAGIC
+
+The reader memory-maps the file and only parses the footer and the small
+header, so opening a snapshot costs the same whatever the history size.
+Records are decoded one at a time when they are accessed. Records of a
+keyed section (MemoryBank findings, keyed by fingerprint) are stored in
+key order and found by binary search over the mapped key table.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+MAGIC = b"TGSNAP01"
+INDEX_ENTRY = struct.Struct("<QIQ")
+FOOTER = struct.Struct("<QQ8s")
+KEY_SIZE = 32
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < len(MAGIC) + FOOTER.size:
+                raise SnapshotError(f"snapshot too small: {path}")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"bad snapshot magic: {path}")
+        header_off, header_len, magic = FOOTER.unpack_from(self._mm, size - FOOTER.size)
+        if magic != MAGIC:
+            raise SnapshotError(f"truncated snapshot: {path}")
+        header = json.loads(self._mm[header_off:header_off + header_len])
+        self.meta: Dict[str, Any] = header.get("meta", {})
+        self._sections: Dict[str, Dict[str, int]] = header.get("sections", {})
+        self._pins = 0
+        self._closing = False
+        self._pin_lock = threading.Lock()
+
+    def sections(self) -> List[str]:
+        return list(self._sections)
+
+    def count(self, section: str) -> int:
+        return self._sections.get(section, {}).get("count", 0)
+
+    def entry(self, section: str, i: int):
+        """(offset, length, seq) of record i without decoding it."""
+        return INDEX_ENTRY.unpack_from(self._mm, self._sections[section]["index"] + i * INDEX_ENTRY.size)
+
+    def raw(self, section: str, i: int) -> bytes:
+        offset, length, _ = self.entry(section, i)
+        return self._mm[offset:offset + length]
+
+    def record(self, section: str, i: int) -> Any:
+        return json.loads(self.raw(section, i))
+
+    def entries(self, section: str) -> Iterable:
+        """(offset, length, seq) for every record, without decoding any."""
+        info = self._sections.get(section)
+        if not info or not info["count"]:
+            return iter(())
+        start = info["index"]
+        return INDEX_ENTRY.iter_unpack(self._mm[start:start + info["count"] * INDEX_ENTRY.size])
+
+    # -----------------------------
+    # Keyed sections
+    # -----------------------------
+    def is_keyed(self, section: str) -> bool:
+        return "keys" in self._sections.get(section, {})
+
+    def key(self, section: str, i: int) -> bytes:
+        off = self._sections[section]["keys"] + i * KEY_SIZE
+        return self._mm[off:off + KEY_SIZE]
+
+    def find(self, section: str, key: bytes) -> Optional[int]:
+        """Position of the record with `key` in a keyed section, or None."""
+        lo, hi = 0, self.count(section)
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            probe = self.key(section, mid)
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def keyed_items(self, section: str) -> Iterable:
+        """(key, raw json bytes, seq) in key order."""
+        for i, (offset, length, seq) in enumerate(self.entries(section)):
+            yield self.key(section, i), self._mm[offset:offset + length], seq
+
+    # -----------------------------
+    # Lifetime
+    # -----------------------------
+    def pin(self) -> None:
+        """Keep the mapping open for a reader outside the owner's lock (e.g. a streaming iterator)."""
+        with self._pin_lock:
+            self._pins += 1
+
+    def unpin(self) -> None:
+        with self._pin_lock:
+            self._pins -= 1
+            if self._closing and not self._pins:
+                self._mm.close()
+
+    def close(self) -> None:
+        """Close the mapping, or once the last pin is released."""
+        with self._pin_lock:
+            self._closing = True
+            if not self._pins:
+                self._mm.close()
+
+
+class LazyRecords:
+    """
+    List-like view of one section: records from a snapshot (decoded on
+    access) followed by records appended since the snapshot was written.
+    """
+
+    def __init__(self, reader: Optional[SnapshotReader] = None, section: str = None, tail: list = None):
+        self._reader = reader
+        self._section = section
+        self._base = reader.count(section) if reader else 0
+        self.tail = tail if tail is not None else []
+
+    def __len__(self):
+        return self._base + len(self.tail)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError(i)
+        if i < self._base:
+            return self._reader.record(self._section, i)
+        return self.tail[i - self._base]
+
+    def __iter__(self):
+        for i in range(self._base):
+            yield self._reader.record(self._section, i)
+        yield from self.tail
+
+    def append(self, record):
+        self.tail.append(record)
+
+    def seq_at(self, i: int) -> int:
+        if i < self._base:
+            return self._reader.entry(self._section, i)[2]
+        return self.tail[i - self._base].get("seq", 0)
+
+    def bisect_seq(self, cursor: int) -> int:
+        """Index of the first record with seq > cursor (records are seq-ordered)."""
+        lo, hi = 0, self._base
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.seq_at(mid) <= cursor:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._base:
+            return lo
+        return self._base + bisect.bisect_right(self.tail, cursor, key=lambda r: r.get("seq", 0))
+
+    def raw_items(self) -> Iterable:
+        """(raw json bytes, seq) for every record; snapshot records are not decoded."""
+        for i in range(self._base):
+            offset, length, seq = self._reader.entry(self._section, i)
+            yield self._reader._mm[offset:offset + length], seq
+        for r in self.tail:
+            yield _encode(r), r.get("seq", 0)
+
+
+def _encode(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=list).encode("utf-8")
+
+
+def merge_keyed(reader: Optional[SnapshotReader], section: str, updates: Dict[bytes, Any]) -> Iterable:
+    """
+    (key, raw, seq) items of a keyed section with `updates` (key -> record)
+    applied on top, in key order. Only the updates are held in memory.
+    """
+    fresh = sorted(updates.items())
+    old = reader.keyed_items(section) if reader is not None and reader.is_keyed(section) else iter(())
+    pos = 0
+    for key, raw, seq in old:
+        while pos < len(fresh) and fresh[pos][0] < key:
+            yield fresh[pos][0], _encode(fresh[pos][1]), fresh[pos][1].get("seq", 0)
+            pos += 1
+        if pos < len(fresh) and fresh[pos][0] == key:
+            # the update replaces the snapshot record
+            yield key, _encode(fresh[pos][1]), fresh[pos][1].get("seq", 0)
+            pos += 1
+            continue
+        yield key, raw, seq
+    for key, record in fresh[pos:]:
+        yield key, _encode(record), record.get("seq", 0)
+
+
+def write_snapshot(path: str, meta: Dict[str, Any], sections: Dict[str, Any],
+                   keyed: Dict[str, Iterable] = None) -> None:
+    """
+    Atomically write a snapshot. `sections` maps a name to a LazyRecords
+    or any iterable of dict records (each with an optional "seq").
+    `keyed` maps a name to (key, raw, seq) items already sorted by key
+    (see merge_keyed); those sections also get a key table.
+    """
+    dirn = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=dirn, prefix=".snaptmp")
+    try:
+        with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+            f.write(MAGIC)
+            pos = len(MAGIC)
+            indexes = {}
+            for name, records in sections.items():
+                items = records.raw_items() if isinstance(records, LazyRecords) else (
+                    (_encode(r), r.get("seq", 0) if isinstance(r, dict) else 0) for r in records
+                )
+                index = bytearray()
+                for raw, seq in items:
+                    f.write(raw)
+                    index += INDEX_ENTRY.pack(pos, len(raw), seq)
+                    pos += len(raw)
+                indexes[name] = index
+            keys = {}
+            for name, items in (keyed or {}).items():
+                index, key_table = bytearray(), bytearray()
+                for key, raw, seq in items:
+                    if len(key) != KEY_SIZE:
+                        raise SnapshotError(f"{name}: keys must be {KEY_SIZE} bytes")
+                    f.write(raw)
+                    index += INDEX_ENTRY.pack(pos, len(raw), seq)
+                    key_table += key
+                    pos += len(raw)
+                indexes[name] = index
+                keys[name] = key_table
+
+            table = {}
+            for name, index in indexes.items():
+                table[name] = {"count": len(index) // INDEX_ENTRY.size, "index": pos}
+                f.write(index)
+                pos += len(index)
+            for name, key_table in keys.items():
+                table[name]["keys"] = pos
+                f.write(key_table)
+                pos += len(key_table)
+
+            header = _encode({"meta": meta, "sections": table})
+            f.write(header)
+            f.write(FOOTER.pack(pos, len(header), MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
+        raise
@@ -0,0 +1,299 @@
+# archive_scanner.py
+"""
+Archive Scanner Tool for ThreatGuard.
+Scans zip, tar (optionally gzip-compressed) and gzip uploads without
+extracting them to disk:
+- members are streamed out of the archive into memory and handed to the
+  FileScannerTool (scan_bytes); nested archives are expanded recursively
+- limits on nesting depth, member size, member count, total expanded bytes
+  and expansion ratio stop zip bombs; expansion stops at the first limit
+  hit and the violation is reported instead of raising
+- members that cannot be read (encrypted, unsupported compression, corrupt
+  data) are reported as findings and the remaining members still scanned
+- members are scanned in a thread pool while the archive is still being
+  read
+- member results are cached by SHA-256 (and signature generation), so the
+  unchanged members of a re-uploaded archive are not scanned again
+
+Limits and pool size come from settings.yaml (archive.*).
+"""
+
+import gzip
+import hashlib
+import io
+import threading
+import tarfile
+import zipfile
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from tools.file_scanner import FileScannerTool
+from tools.signature_packs import SEVERITIES
+from utils.config import get_setting
+
+MB = 1024 * 1024
+READ_CHUNK = 256 * 1024
+# raised by zipfile for one member: encrypted (RuntimeError), unsupported
+# compression method (NotImplementedError), corrupt data or bad CRC
+MEMBER_ERRORS = (RuntimeError, NotImplementedError, zlib.error, zipfile.BadZipFile, EOFError)
+
+
+class ArchiveLimitExceeded(Exception):
+    pass
+
+
+def archive_kind(head: bytes) -> Optional[str]:
+    """'zip', 'gzip', 'tar' or None, from the first 512 bytes."""
+    if head.startswith((b"PK\x03\x04", b"PK\x05\x06")):
+        return "zip"
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head[257:262] == b"ustar":
+        return "tar"
+    return None
+
+
+def is_archive(data) -> bool:
+    return archive_kind(bytes(data[:512])) is not None
+
+
+class ScanCache:
+    """Thread-safe LRU of member scan results keyed by (sha256, signature generation)."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ScanCache:
+    """Process-wide member cache, shared by all archive scanners."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ScanCache(int(get_setting("archive", "cache_entries", 10000)))
+        return _default_cache
+
+
+class _ScanState:
+    """Budget and pending member scans for one archive."""
+
+    def __init__(self, input_size: int, max_total: int, max_ratio: int, max_members: int):
+        self.max_total = min(max_total, max(input_size, 1) * max_ratio)
+        self.max_members = max_members
+        self.expanded = 0
+        self.members = 0
+        self.futures = []
+        self.violations: List[str] = []
+        self.unreadable: List[str] = []
+
+    def charge(self, n: int, path: str) -> None:
+        self.expanded += n
+        if self.expanded > self.max_total:
+            raise ArchiveLimitExceeded(f"{path}: archive expands beyond {self.max_total} bytes")
+
+    def count_member(self, path: str) -> None:
+        self.members += 1
+        if self.members > self.max_members:
+            raise ArchiveLimitExceeded(f"{path}: more than {self.max_members} members")
+
+
+class ArchiveScannerTool:
+    def __init__(self, file_scanner: FileScannerTool = None, ioc_store=None, cache: ScanCache = None,
+                 max_workers: int = None, logger=None):
+        self.file_scanner = file_scanner or FileScannerTool()
+        self.ioc_store = ioc_store
+        self.cache = cache or get_default_cache()
+        self.logger = logger
+        self.max_workers = max_workers or int(get_setting("archive", "max_workers", 4))
+        self.max_depth = int(get_setting("archive", "max_depth", 3))
+        self.max_ratio = int(get_setting("archive", "max_ratio", 100))
+        self.max_total_bytes = int(get_setting("archive", "max_total_mb", 512)) * MB
+        self.max_member_bytes = int(get_setting("archive", "max_member_mb", 64)) * MB
+        self.max_members = int(get_setting("archive", "max_members", 10000))
+
+    # -----------------------------
+    # Expansion
+    # -----------------------------
+    def _read_member(self, stream, path: str, state: _ScanState) -> bytes:
+        chunks, size = [], 0
+        while True:
+            chunk = stream.read(READ_CHUNK)
+            if not chunk:
+                return b"".join(chunks)
+            size += len(chunk)
+            if size > self.max_member_bytes:
+                raise ArchiveLimitExceeded(f"{path}: member larger than {self.max_member_bytes} bytes")
+            state.charge(len(chunk), path)
+            chunks.append(chunk)
+
+    def _walk(self, fileobj, path: str, kind: str, level: int, state: _ScanState, pool) -> None:
+        if level > self.max_depth:
+            raise ArchiveLimitExceeded(f"{path}: archives nested deeper than {self.max_depth}")
+
+        if kind == "zip":
+            with zipfile.ZipFile(fileobj) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    member_path = f"{path}/{info.filename}"
+                    state.count_member(member_path)
+                    # declared sizes can lie, the byte budget is enforced while reading too
+                    if info.compress_size and info.file_size / info.compress_size > self.max_ratio:
+                        raise ArchiveLimitExceeded(f"{member_path}: compression ratio above {self.max_ratio}")
+                    if info.flag_bits & 0x1:
+                        state.unreadable.append(f"{member_path}: encrypted member")
+                        continue
+                    try:
+                        with zf.open(info) as member:
+                            data = self._read_member(member, member_path, state)
+                    except MEMBER_ERRORS as e:
+                        state.unreadable.append(f"{member_path}: unreadable member ({e})")
+                        continue
+                    self._member(data, member_path, level, state, pool)
+            return
+
+        if kind == "gzip":
+            with gzip.GzipFile(fileobj=fileobj) as gz:
+                head = gz.read(512)
+            fileobj.seek(0)
+            if archive_kind(head) == "tar":
+                kind = "tar"
+            else:
+                name = path[:-3] if path.endswith(".gz") else f"{path}/<gunzip>"
+                state.count_member(name)
+                with gzip.GzipFile(fileobj=fileobj) as gz:
+                    data = self._read_member(gz, name, state)
+                self._member(data, name, level, state, pool)
+                return
+
+        # stream mode: members are read in order, nothing is seeked or extracted
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+            for info in tf:
+                if not info.isfile():
+                    continue
+                member_path = f"{path}/{info.name}"
+                state.count_member(member_path)
+                data = self._read_member(tf.extractfile(info), member_path, state)
+                self._member(data, member_path, level, state, pool)
+
+    def _member(self, data: bytes, path: str, level: int, state: _ScanState, pool) -> None:
+        kind = archive_kind(data[:512])
+        if kind:
+            self._walk(io.BytesIO(data), path, kind, level + 1, state, pool)
+        else:
+            generation = self.file_scanner.signatures.current().generation
+            state.futures.append(pool.submit(self._scan_member, data, path, generation))
+
+    # -----------------------------
+    # Member scanning
+    # -----------------------------
+    def _scan_member(self, data: bytes, path: str, generation: int) -> Dict[str, Any]:
+        sha = hashlib.sha256(data).hexdigest()
+        key = (sha, generation)
+        scan = self.cache.get(key)
+        cached = scan is not None
+        if not cached:
+            scan = self.file_scanner.scan_bytes(data, expand_archives=False)
+            self.cache.put(key, scan)
+        return {
+            "path": path,
+            "size": len(data),
+            "sha256": sha,
+            "cached": cached,
+            "ioc_hash_match": bool(self.ioc_store) and self.ioc_store.lookup_hash(sha),
+            "detected_issues": scan["detected_issues"],
+            "severity": scan["severity"],
+            "is_binary": scan["binary"]["is_binary"],
+        }
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def scan_stream(self, fileobj, name: str = "<upload>", size: int = None) -> Dict[str, Any]:
+        """Scan a seekable binary stream (open file or BytesIO)."""
+        head = fileobj.read(512)
+        fileobj.seek(0)
+        kind = archive_kind(head)
+        if size is None:
+            size = fileobj.seek(0, io.SEEK_END)
+            fileobj.seek(0)
+        state = _ScanState(size, self.max_total_bytes, self.max_ratio, self.max_members)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            if kind is None:
+                state.violations.append(f"{name}: not a zip, tar or gzip archive")
+            else:
+                try:
+                    self._walk(fileobj, name, kind, 1, state, pool)
+                except ArchiveLimitExceeded as e:
+                    state.violations.append(str(e))
+                except (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError, zlib.error) as e:
+                    state.violations.append(f"{name}: corrupt archive ({e})")
+            members = [f.result() for f in state.futures]
+
+        issues = sorted({issue for m in members for issue in m["detected_issues"]})
+        severity = "LOW"
+        if members:
+            severity = max((m["severity"] for m in members), key=lambda s: SEVERITIES.index(s.lower())).upper()
+        if state.violations and kind is not None:
+            # a bomb or a broken archive is itself a finding
+            issues.append("Archive Limit Exceeded")
+            severity = "HIGH" if SEVERITIES.index(severity.lower()) < SEVERITIES.index("high") else severity
+        if state.unreadable:
+            # content that could not be inspected is a finding, not a crash
+            issues.append("Encrypted/Unreadable Archive Member")
+            severity = "HIGH" if SEVERITIES.index(severity.lower()) < SEVERITIES.index("high") else severity
+
+        result = {
+            "archive": name,
+            "archive_type": kind,
+            "members": members,
+            "detected_issues": issues,
+            "severity": severity,
+            "limits_exceeded": state.violations,
+            "unreadable_members": state.unreadable,
+            "summary": {
+                "members": len(members),
+                "cached": sum(1 for m in members if m["cached"]),
+                "unreadable": len(state.unreadable),
+                "ioc_hash_matches": sum(1 for m in members if m["ioc_hash_match"]),
+                "bytes_expanded": state.expanded,
+            },
+        }
+        if self.logger:
+            self.logger.log(
+                f"[ArchiveScanner] {name}: {len(members)} member(s), "
+                f"{result['summary']['cached']} cached, severity {severity}"
+            )
+        return result
+
+    def scan_bytes(self, data, name: str = "<upload>") -> Dict[str, Any]:
+        return self.scan_stream(io.BytesIO(bytes(data)), name=name, size=len(data))
+
+    def scan_file(self, path: str) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            return self.scan_stream(f, name=path)
@@ -0,0 +1,227 @@
+# binary_scanner.py
+"""
+Binary Scanner Tool for ThreatGuard.
+Bytes-native analysis for uploads the text scanners cannot see:
+- text vs binary detection (NUL bytes / share of non-text bytes)
+- file type from magic bytes and known packer markers (UPX, MPRESS, ...)
+- byte histogram and overall Shannon entropy
+- sliding-window entropy (4 KiB windows, 1 KiB step) to locate high-entropy
+  regions, i.e. packed, compressed or encrypted content
+
+Windows are computed with NumPy from per-block byte histograms, one chunk
+of a memory-mapped file at a time, so memory stays bounded. Block
+histograms come from one bincount per 64 blocks over uint16 keys
+(byte + 256 * block), which stays in cache; window histograms are sums
+of shifted block histograms. Inputs shorter than one window are judged on their
+whole-buffer entropy, bias-corrected for the small sample. Without NumPy
+only the overall histogram and entropy are computed.
+"""
+
+import math
+import mmap
+import os
+from typing import Any, Dict, List
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    HAS_NUMPY = False
+
+BLOCK_SIZE = 1024
+WINDOW_BLOCKS = 4
+CHUNK_BLOCKS = 1024
+# blocks per bincount call; keys (byte + 256 * block) must fit in uint16
+HIST_BLOCKS = 64
+# shorter inputs are too small to judge by entropy
+MIN_ENTROPY_BYTES = 64
+HIGH_ENTROPY = 7.2
+# share of the data in high-entropy windows above which an executable counts as packed
+PACKED_RATIO = 0.6
+TEXT_PROBE = 8192
+
+MAGIC_TYPES = [
+    (b"MZ", "pe"),
+    (b"\x7fELF", "elf"),
+    (b"\xcf\xfa\xed\xfe", "macho"),
+    (b"PK\x03\x04", "zip"),
+    (b"\x1f\x8b", "gzip"),
+    (b"%PDF", "pdf"),
+    (b"\x89PNG", "png"),
+]
+EXECUTABLE_TYPES = {"pe", "elf", "macho"}
+PACKER_MARKERS = {
+    b"UPX!": "UPX",
+    b"UPX0": "UPX",
+    b"MPRESS1": "MPRESS",
+    b".aspack": "ASPack",
+    b"PEC2": "PECompact",
+    b".petite": "Petite",
+}
+TEXT_BYTES = bytes(range(32, 127)) + b"\t\n\r\f\b"
+
+
+def is_binary(data) -> bool:
+    probe = bytes(data[:TEXT_PROBE])
+    if not probe:
+        return False
+    if b"\x00" in probe:
+        return True
+    try:
+        probe.decode("utf-8")
+        return False
+    except UnicodeDecodeError as e:
+        # a multi-byte character cut at the probe boundary is still text
+        if e.start >= len(probe) - 3:
+            return False
+    non_text = len(probe.translate(None, TEXT_BYTES))
+    return non_text / len(probe) > 0.3
+
+
+def _entropy_from_counts(counts, total: int) -> float:
+    if total <= 0:
+        return 0.0
+    ent = 0.0
+    for c in counts:
+        if c:
+            p = c / total
+            ent -= p * math.log2(p)
+    return ent
+
+
+def _corrected_entropy(counts, total: int) -> float:
+    """Shannon entropy with the Miller-Madow small-sample bias correction."""
+    observed = sum(1 for c in counts if c)
+    return _entropy_from_counts(counts, total) + (observed - 1) / (2 * total * math.log(2))
+
+
+class BinaryScanner:
+    def __init__(self, high_entropy: float = HIGH_ENTROPY, block_size: int = BLOCK_SIZE,
+                 window_blocks: int = WINDOW_BLOCKS):
+        self.high_entropy = high_entropy
+        self.block_size = block_size
+        self.window_blocks = window_blocks
+        if HAS_NUMPY:
+            # c * log2(c) for every possible count in a window, for table lookups
+            w = block_size * window_blocks
+            counts = np.arange(w + 1, dtype=np.float64)
+            counts[0] = 1.0
+            self._clogc = counts * np.log2(counts)
+            self._offsets = (np.arange(HIST_BLOCKS, dtype=np.uint16) * 256)[:, None]
+
+    # -----------------------------
+    # Entropy
+    # -----------------------------
+    def _window_entropy(self, data):
+        """Byte histogram and per-window entropy (NumPy path)."""
+        arr = np.frombuffer(data, dtype=np.uint8)
+        bs, k = self.block_size, self.window_blocks
+        w = bs * k
+        histogram = np.zeros(256, dtype=np.int64)
+        entropies = []
+        offsets = self._offsets
+        n_blocks = len(arr) // bs
+        # the last k-1 block histograms of the previous chunk lead each chunk;
+        # intp so the c*log2(c) table lookup needs no index cast
+        hists = np.empty((CHUNK_BLOCKS + k - 1, 256), dtype=np.intp)
+        lead = 0
+        for start in range(0, n_blocks, CHUNK_BLOCKS):
+            n = min(n_blocks, start + CHUNK_BLOCKS) - start
+            for s in range(0, n, HIST_BLOCKS):
+                m = min(HIST_BLOCKS, n - s)
+                sub = arr[(start + s) * bs:(start + s + m) * bs].reshape(m, bs)
+                # one bincount for m blocks: byte value + 256 * block index
+                counts = np.bincount((sub + offsets[:m]).ravel(), minlength=m * 256)
+                hists[lead + s:lead + s + m] = counts.reshape(m, 256)
+            total = lead + n
+            histogram += hists[lead:total].sum(axis=0)
+            if total >= k:
+                # window histogram = sum of k consecutive block histograms
+                windows = total - k + 1
+                window_hist = hists[k - 1:total].copy()
+                for j in range(k - 1):
+                    window_hist += hists[j:j + windows]
+                entropies.append(np.log2(w) - self._clogc[window_hist].sum(axis=1) / w)
+            lead = min(k - 1, total)
+            hists[:lead] = hists[total - lead:total]
+        tail = arr[n_blocks * bs:]
+        if len(tail):
+            histogram += np.bincount(tail, minlength=256)
+        window_entropy = np.concatenate(entropies) if entropies else np.zeros(0)
+        return histogram, window_entropy
+
+    def _regions(self, window_entropy) -> List[Dict[str, Any]]:
+        """Merge consecutive high-entropy windows into byte ranges."""
+        bs, w = self.block_size, self.block_size * self.window_blocks
+        flagged = window_entropy >= self.high_entropy
+        if not flagged.any():
+            return []
+        edges = np.diff(np.concatenate([[0], flagged.astype(np.int8), [0]]))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        return [
+            {
+                "start": int(s * bs),
+                "end": int((e - 1) * bs + w),
+                "max_entropy": round(float(window_entropy[s:e].max()), 3),
+            }
+            for s, e in zip(starts, ends)
+        ]
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def scan_bytes(self, data) -> Dict[str, Any]:
+        """Analyze bytes, bytearray, memoryview or mmap content."""
+        size = len(data)
+        head = bytes(data[:16])
+        file_type = next((name for magic, name in MAGIC_TYPES if head.startswith(magic)), "unknown")
+        # packer markers live in the headers / section table
+        probe = bytes(data[:4096])
+        packer = next((name for marker, name in PACKER_MARKERS.items() if marker in probe), None)
+
+        result = {
+            "size": size,
+            "is_binary": is_binary(data),
+            "file_type": file_type,
+            "packer": packer,
+        }
+
+        if HAS_NUMPY and size:
+            histogram, window_entropy = self._window_entropy(data)
+            regions = self._regions(window_entropy)
+            high_ratio = float((window_entropy >= self.high_entropy).mean()) if len(window_entropy) else 0.0
+            result["entropy"] = round(_entropy_from_counts(histogram.tolist(), size), 3)
+            result["high_entropy_regions"] = regions[:50]
+            result["high_entropy_ratio"] = round(high_ratio, 3)
+            result["top_bytes"] = [int(b) for b in np.argsort(-histogram)[:8]]
+        else:
+            raw = bytes(data)
+            counts = [raw.count(bytes([b])) for b in range(256)]
+            result["entropy"] = round(_entropy_from_counts(counts, size), 3)
+            result["high_entropy_regions"] = []
+            result["high_entropy_ratio"] = 1.0 if result["entropy"] >= self.high_entropy else 0.0
+            result["top_bytes"] = sorted(range(256), key=lambda b: -counts[b])[:8]
+
+        window = self.block_size * self.window_blocks
+        if MIN_ENTROPY_BYTES <= size < window:
+            # too short for a single window: judge the whole buffer instead
+            counts = histogram.tolist() if HAS_NUMPY else counts
+            short_entropy = _corrected_entropy(counts, size)
+            flagged = short_entropy >= self.high_entropy
+            result["high_entropy_regions"] = (
+                [{"start": 0, "end": size, "max_entropy": round(short_entropy, 3)}] if flagged else []
+            )
+            result["high_entropy_ratio"] = 1.0 if flagged else 0.0
+
+        result["packed"] = bool(packer) or (
+            file_type in EXECUTABLE_TYPES and result["high_entropy_ratio"] >= PACKED_RATIO
+        )
+        return result
+
+    def scan_path(self, path: str) -> Dict[str, Any]:
+        """Analyze a file through a read-only memory map."""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.scan_bytes(b"")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self.scan_bytes(mm)
@@ -2,32 +2,121 @@
 """
 Simulated File Scanner Tool for ThreatGuard.
 Reads text, detects suspicious patterns, and returns structured results.
+Detection rules come from the signature packs configured in settings.yaml
+(see signature_packs.py) and are hot-swapped when a pack file changes.
+
+Raw bytes and files go through scan_bytes / scan_file: binary content is
+analyzed by the BinaryScanner (entropy, packers) and skips the regex
+rules, which only make sense for text. Zip/tar/gzip content is handed to
+the ArchiveScannerTool, which scans its members one by one.
 """
 
-import re
 from typing import Dict, Any
 
+from tools.binary_scanner import BinaryScanner
+from tools.signature_packs import SEVERITIES, SignaturePackManager, get_default_manager
+
+# binary findings -> (issue name, severity)
+BINARY_ISSUES = {
+    "packed": ("Packed Executable", "high"),
+    "high_entropy": ("High Entropy Region", "medium"),
+}
+
+
+def _is_archive(data) -> bool:
+    # imported here: archive_scanner imports this module
+    from tools.archive_scanner import is_archive
+    return is_archive(data)
+
 
 class FileScannerTool:
-    def __init__(self):
-        pass
+    def __init__(self, signatures: SignaturePackManager = None, binary_scanner: BinaryScanner = None,
+                 archive_scanner=None):
+        self.signatures = signatures or get_default_manager()
+        self.binary_scanner = binary_scanner or BinaryScanner()
+        # ArchiveScannerTool; created on first use (archive_scanner.py imports this module)
+        self._archive_scanner = archive_scanner
 
-    def scan_text(self, text: str) -> Dict[str, Any]:
-        findings = []
+    @property
+    def archive_scanner(self):
+        if self._archive_scanner is None:
+            from tools.archive_scanner import ArchiveScannerTool
+            self._archive_scanner = ArchiveScannerTool(file_scanner=self)
+        return self._archive_scanner
 
-        suspicious_patterns = {
-            "SQL Injection": r"(DROP TABLE|UNION SELECT|--|;--)",
-            "XSS": r"(<script>|javascript:)",
-            "Hardcoded Password": r"(password\s*=|pwd\s*=|\"password\")",
-            "Dangerous API": r"(eval\(|exec\()",
-        }
+    def scan_text(self, text: str) -> Dict[str, Any]:
+        # hold one signature set for the whole scan, even if a reload swaps it
+        signature_set = self.signatures.current()
+        matches = signature_set.match(text)
+        findings = [m["name"] for m in matches]
 
-        for threat_name, pattern in suspicious_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                findings.append(threat_name)
+        severity = "LOW"
+        if matches:
+            severity = max((m["severity"] for m in matches), key=SEVERITIES.index).upper()
 
         return {
             "raw_text_length": len(text),
             "detected_issues": findings,
-            "severity": "HIGH" if findings else "LOW"
+            "matched_rules": matches,
+            "signature_version": signature_set.version,
+            "severity": severity
         }
+
+    def _scan_binary(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        issues = []
+        if analysis["packed"]:
+            issues.append(BINARY_ISSUES["packed"])
+        if analysis["high_entropy_regions"]:
+            issues.append(BINARY_ISSUES["high_entropy"])
+        severity = "LOW"
+        if issues:
+            severity = max((sev for _, sev in issues), key=SEVERITIES.index).upper()
+        return {
+            "raw_text_length": 0,
+            "detected_issues": [name for name, _ in issues],
+            "matched_rules": [],
+            "signature_version": None,
+            "severity": severity,
+            "binary": analysis,
+        }
+
+    def _scan_archive(self, analysis: Dict[str, Any], archive: Dict[str, Any]) -> Dict[str, Any]:
+        # compressed containers are high-entropy by nature; the members decide
+        return {
+            "raw_text_length": 0,
+            "detected_issues": archive["detected_issues"],
+            "matched_rules": [],
+            "signature_version": self.signatures.current().version,
+            "severity": archive["severity"],
+            "binary": analysis,
+            "archive": archive,
+        }
+
+    def scan_bytes(self, data, expand_archives: bool = True) -> Dict[str, Any]:
+        """
+        Scan raw bytes: archive members for zip/tar/gzip content, text rules
+        for text content, binary analysis otherwise. expand_archives=False
+        is used for archive members, which the ArchiveScannerTool expands itself.
+        """
+        analysis = self.binary_scanner.scan_bytes(data)
+        if expand_archives and _is_archive(data):
+            return self._scan_archive(analysis, self.archive_scanner.scan_bytes(data))
+        if analysis["is_binary"]:
+            return self._scan_binary(analysis)
+        result = self.scan_text(bytes(data).decode("utf-8", errors="replace"))
+        result["binary"] = analysis
+        return result
+
+    def scan_file(self, path: str) -> Dict[str, Any]:
+        """Scan a file on disk; binary files are analyzed through a memory map, archives streamed."""
+        analysis = self.binary_scanner.scan_path(path)
+        with open(path, "rb") as f:
+            head = f.read(512)
+        if _is_archive(head):
+            return self._scan_archive(analysis, self.archive_scanner.scan_file(path))
+        if analysis["is_binary"]:
+            return self._scan_binary(analysis)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            result = self.scan_text(f.read())
+        result["binary"] = analysis
+        return result
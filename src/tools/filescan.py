@@ -2,16 +2,34 @@
 """
 FileScan Tool — Simulated file scanning tool for ThreatGuard.
 This tool analyzes metadata, file patterns, and threat signatures.
+File hashes and string indicators are checked against the IOC store
+(threat-intel feeds, see ioc_store.py) configured in settings.yaml, and
+content is compared with previously saved threats (similarity_index.py)
+to catch modified variants.
+
+file_content may be str or bytes. Bytes are hashed as-is; binary content
+gets entropy / packer analysis (binary_scanner.py) instead of the text
+indicator and keyword checks. Zip/tar/gzip content is expanded in memory
+and its members scanned one by one (archive_scanner.py).
 """
 
 import hashlib
 import json
 from typing import Dict, Any
 
+from tools.archive_scanner import ArchiveScannerTool, is_archive
+from tools.binary_scanner import BinaryScanner
+from tools.ioc_store import IOCStore, get_default_store
+from tools.similarity_index import SimilarityIndex, get_shared_index
+
 
 class FileScanTool:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, ioc_store: IOCStore = None, similarity_index: SimilarityIndex = None):
         self.logger = logger
+        self.ioc_store = ioc_store or get_default_store(logger=logger)
+        self.similarity_index = similarity_index
+        self.binary_scanner = BinaryScanner()
+        self.archive_scanner = ArchiveScannerTool(ioc_store=self.ioc_store, logger=logger)
 
     def run(self, threat_info: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -21,17 +39,51 @@ class FileScanTool:
         metadata = threat_info.get("metadata", {})
         file_content = metadata.get("file_content", "N/A")
 
-        # Simulated hash of the file content
-        file_hash = hashlib.sha256(file_content.encode()).hexdigest()
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            data = bytes(file_content)
+            binary = self.binary_scanner.scan_bytes(data)
+            text = None if binary["is_binary"] else data.decode("utf-8", errors="replace")
+        else:
+            data = str(file_content).encode()
+            text = str(file_content)
+            binary = None
+
+        file_hash = hashlib.sha256(data).hexdigest()
+
+        # pick up a freshly built feed index without restarting
+        self.ioc_store.maybe_reload()
+        hash_match = self.ioc_store.lookup_hash(file_hash)
+        # text-only checks are skipped for binary content
+        indicator_matches = self.ioc_store.match_text(text) if text is not None else []
+        similar = self.similarity_index.query(data) if self.similarity_index is not None else []
+        keyword_hit = text is not None and "virus" in text.lower()
+        infected = hash_match or bool(indicator_matches) or keyword_hit
 
         result = {
             "file_hash": file_hash,
-            "scan_status": "clean" if "virus" not in file_content.lower() else "infected",
+            "scan_status": "infected" if infected else "clean",
             "details": {
-                "size": len(file_content),
+                "size": len(data),
                 "source": threat_info.get("source"),
-            }
+            },
+            "ioc": {
+                "indicators_loaded": self.ioc_store.size,
+                "hash_match": hash_match,
+                "indicator_matches": indicator_matches,
+            },
+            "similar_threats": similar,
         }
+        if binary is not None:
+            result["binary"] = binary
+            if binary["packed"] and result["scan_status"] == "clean":
+                result["scan_status"] = "suspicious"
+            if is_archive(data):
+                archive = self.archive_scanner.scan_bytes(data, name=metadata.get("file_name", "<upload>"))
+                result["archive"] = archive
+                if archive["summary"]["ioc_hash_matches"]:
+                    result["scan_status"] = "infected"
+                elif archive["detected_issues"] and result["scan_status"] == "clean":
+                    result["scan_status"] = "suspicious"
 
         if self.logger:
             self.logger.log("[FileScanTool] Scan Result: " + json.dumps(result))
@@ -41,8 +93,9 @@ class FileScanTool:
 
 # Helper wrapper so ActionAgent can call this tool easily
 class ToolExecutor:
-    def __init__(self, logger=None):
-        self.file_scan_tool = FileScanTool(logger)
+    def __init__(self, logger=None, memory=None):
+        similarity_index = get_shared_index(memory, logger=logger) if memory is not None else None
+        self.file_scan_tool = FileScanTool(logger, similarity_index=similarity_index)
 
     def run_filescan(self, threat_info):
         return self.file_scan_tool.run(threat_info)
@@ -0,0 +1,300 @@
+# ioc_store.py
+"""
+IOC Store — threat-intel lookup for file hashes and string indicators.
+
+Index file layout (little-endian):
+
+    MAGIC | count u64 | bloom bits u64 | k u32 | pad u32 | bloom bytes | sorted digests (32 bytes each)
+
+Every indicator is stored as a 32-byte digest: SHA-256 file hashes as-is,
+string indicators (domains, IPs, URLs, ...) as sha256("str:" + lowercased).
+The Bloom filter is loaded into memory (~10 bits per entry) and answers
+most misses after one or two bit probes; hits and false positives fall
+through to a binary search on the memory-mapped sorted table, which stays
+on disk / in the page cache.
+
+Indexes are built offline (`python -m tools.ioc_store build OUT FEED...`)
+with a chunked external sort, written to a temp file and renamed into
+place. A running IOCStore notices the new file and swaps it in atomically;
+lookups already in progress finish on the old index.
+
+get_default_store() returns the process-wide store for the index named in
+settings.yaml (ioc.index_file), so the Bloom filter is loaded once per
+process rather than once per scanner.
+"""
+
+import hashlib
+import heapq
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+from utils.config import get_setting, resolve_path
+
+MAGIC = b"TGIOC001"
+HEADER = struct.Struct("<QQI4x")
+PROBE_SEED = struct.Struct("<II")
+DIGEST_SIZE = 32
+BITS_PER_ENTRY = 10
+NUM_HASHES = 7
+CHUNK_ENTRIES = 1_000_000
+
+SHA256_RE = re.compile(r"^[0-9a-fA-F]{64}$")
+# candidate string indicators inside scanned content
+TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:/@\-]{3,253}")
+
+
+def indicator_digest(indicator: str) -> bytes:
+    indicator = indicator.strip()
+    if SHA256_RE.match(indicator):
+        return bytes.fromhex(indicator)
+    return hashlib.sha256(b"str:" + indicator.lower().encode("utf-8")).digest()
+
+
+def _bloom_positions(digest: bytes, m: int, k: int) -> Iterator[int]:
+    # the digest is already uniformly distributed: double hashing on two
+    # 32-bit words of it; m is a power of two so reduction is a mask
+    pos, step = PROBE_SEED.unpack_from(digest)
+    step |= 1
+    mask = m - 1
+    for _ in range(k):
+        yield pos & mask
+        pos += step
+
+
+class _IOCIndex:
+    """One immutable, memory-mapped index file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"not an IOC index: {path}")
+        self.count, self.m, self.k = HEADER.unpack_from(self._mm, len(MAGIC))
+        bloom_off = len(MAGIC) + HEADER.size
+        # the Bloom filter is the only part held in RAM
+        self.bloom = bytes(self._mm[bloom_off:bloom_off + self.m // 8])
+        self.table_off = bloom_off + self.m // 8
+
+    def might_contain(self, digest: bytes) -> bool:
+        # inlined _bloom_positions: this is the hot path for misses
+        bloom, mask = self.bloom, self.m - 1
+        pos, step = PROBE_SEED.unpack_from(digest)
+        step |= 1
+        for _ in range(self.k):
+            p = pos & mask
+            if not bloom[p >> 3] >> (p & 7) & 1:
+                return False
+            pos += step
+        return True
+
+    def contains(self, digest: bytes) -> bool:
+        if not self.count or not self.might_contain(digest):
+            return False
+        mm, base = self._mm, self.table_off
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            off = base + mid * DIGEST_SIZE
+            probe = mm[off:off + DIGEST_SIZE]
+            if probe < digest:
+                lo = mid + 1
+            elif probe > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+
+class IOCStore:
+    def __init__(self, index_path: str = None, logger=None):
+        self.index_path = index_path
+        self.logger = logger
+        self._index: Optional[_IOCIndex] = None
+        self._swap_lock = threading.Lock()
+        self.maybe_reload()
+
+    # -----------------------------
+    # Index lifecycle
+    # -----------------------------
+    def maybe_reload(self) -> bool:
+        """Swap in a rebuilt index file if it changed on disk. Cheap (one stat)."""
+        if not self.index_path:
+            return False
+        try:
+            st = os.stat(self.index_path)
+        except OSError:
+            return False
+        current = self._index
+        if current is not None and current.identity == (st.st_ino, st.st_mtime_ns, st.st_size):
+            return False
+        with self._swap_lock:
+            try:
+                index = _IOCIndex(self.index_path)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log(f"[IOCStore] Could not load {self.index_path}: {e}")
+                return False
+            # single reference assignment: readers see either the old or the new index
+            self._index = index
+        if self.logger:
+            self.logger.log(f"[IOCStore] Loaded {index.count} indicators from {self.index_path}")
+        return True
+
+    def swap(self, index_path: str) -> bool:
+        """Point the store at a different index file (e.g. a new feed)."""
+        self.index_path = index_path
+        return self.maybe_reload()
+
+    @property
+    def size(self) -> int:
+        index = self._index
+        return index.count if index else 0
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def contains(self, indicator: str) -> bool:
+        index = self._index
+        return bool(index) and index.contains(indicator_digest(indicator))
+
+    def lookup_hash(self, sha256_hex: str) -> bool:
+        index = self._index
+        return bool(index) and index.contains(bytes.fromhex(sha256_hex))
+
+    def match_text(self, text: str, limit: int = 20) -> List[str]:
+        """String indicators from the feed that appear as tokens in text."""
+        index = self._index
+        if not index or not index.count:
+            return []
+        hits, seen = [], set()
+        for token in TOKEN_RE.findall(text):
+            token = token.rstrip(".:/-").lower()
+            if token in seen:
+                continue
+            seen.add(token)
+            if index.contains(indicator_digest(token)):
+                hits.append(token)
+                if len(hits) >= limit:
+                    break
+        return hits
+
+    # -----------------------------
+    # Offline build
+    # -----------------------------
+    @staticmethod
+    def _read_feed(path: str) -> Iterator[str]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                # CSV feeds: indicator is the first column
+                yield line.split(",", 1)[0].strip()
+
+    @staticmethod
+    def build(out_path: str, feed_paths: Iterable[str], chunk_entries: int = CHUNK_ENTRIES) -> int:
+        """
+        Build an index from feed files (one indicator per line, or CSV with
+        the indicator first). Sorted runs are spilled to temp files and
+        merged, so memory stays bounded by the chunk size and the Bloom
+        filter. Returns the number of unique indicators.
+        """
+        out_dir = os.path.dirname(os.path.abspath(out_path))
+        os.makedirs(out_dir, exist_ok=True)
+        runs, chunk, total = [], [], 0
+
+        def spill():
+            chunk.sort()
+            fd, run_path = tempfile.mkstemp(dir=out_dir, prefix=".iocrun")
+            with os.fdopen(fd, "wb") as f:
+                f.write(b"".join(chunk))
+            runs.append(run_path)
+            chunk.clear()
+
+        def read_run(run_path):
+            with open(run_path, "rb", buffering=1 << 20) as f:
+                while True:
+                    d = f.read(DIGEST_SIZE)
+                    if len(d) < DIGEST_SIZE:
+                        return
+                    yield d
+
+        tmp_path = None
+        try:
+            for feed in feed_paths:
+                for indicator in IOCStore._read_feed(feed):
+                    chunk.append(indicator_digest(indicator))
+                    total += 1
+                    if len(chunk) >= chunk_entries:
+                        spill()
+            if chunk:
+                spill()
+
+            # size the filter for the pre-dedupe count, rounded up to a power of two
+            m = 1 << max(6, (total * BITS_PER_ENTRY - 1).bit_length())
+            bloom = bytearray(m // 8)
+            count = 0
+            fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".ioctmp")
+            with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+                f.write(MAGIC)
+                f.write(HEADER.pack(0, m, NUM_HASHES))
+                f.write(bytes(m // 8))
+                last = None
+                for digest in heapq.merge(*(read_run(r) for r in runs)):
+                    if digest == last:
+                        continue
+                    last = digest
+                    f.write(digest)
+                    count += 1
+                    for pos in _bloom_positions(digest, m, NUM_HASHES):
+                        bloom[pos >> 3] |= 1 << (pos & 7)
+                f.seek(len(MAGIC))
+                f.write(HEADER.pack(count, m, NUM_HASHES))
+                f.write(bloom)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, out_path)
+            return count
+        except Exception:
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except Exception:
+                    pass
+            raise
+        finally:
+            for run_path in runs:
+                try:
+                    os.remove(run_path)
+                except Exception:
+                    pass
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_default_store(logger=None) -> IOCStore:
+    """Process-wide store built from settings.yaml, shared by all scanners."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = IOCStore(resolve_path(get_setting("ioc", "index_file")), logger=logger)
+        return _default_store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != "build":
+        print("usage: python -m tools.ioc_store build OUT_INDEX FEED [FEED ...]")
+        sys.exit(2)
+    n = IOCStore.build(sys.argv[2], sys.argv[3:])
+    print(f"Built {sys.argv[2]} with {n} indicators")
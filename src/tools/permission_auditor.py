@@ -0,0 +1,309 @@
+# permission_auditor.py
+"""
+Permission Auditor Tool for ThreatGuard.
+Walks the filesystem with os.scandir and reports:
+- world-writable files and directories (sticky-bit directories like /tmp are allowed)
+- setuid / setgid binaries
+- files owned by a uid/gid that has no passwd/group entry
+
+The walk uses the lstat results cached on each directory entry, never crosses
+mount boundaries, skips pseudo filesystems (proc, sysfs, ...) and fans out
+across top-level subtrees in a thread pool. tmpfs mounts (/tmp, /dev/shm,
+/run, ...) are common drop locations, so those under an audited root are
+walked as roots of their own. Results are kept per subtree so a later
+`reaudit(paths)` only walks the subtrees that changed.
+
+get_default_auditor() returns a process-wide auditor, so repeated system
+scans can re-audit incrementally instead of walking everything again.
+"""
+
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Iterable
+
+try:
+    import pwd
+    import grp
+    HAS_PWD = True
+except Exception:
+    HAS_PWD = False
+
+PSEUDO_FILESYSTEMS = {
+    "proc", "sysfs", "devtmpfs", "devpts", "cgroup", "cgroup2",
+    "securityfs", "debugfs", "tracefs", "pstore", "bpf", "configfs",
+    "fusectl", "mqueue", "hugetlbfs", "binfmt_misc", "autofs", "efivarfs",
+    "rpc_pipefs", "nsfs", "overlay_proc", "selinuxfs",
+}
+
+# always skipped, even when /proc/self/mounts is unavailable
+SKIP_PATHS = {"/proc", "/sys", "/dev"}
+# memory-backed filesystems that are walked as separate roots
+DROP_FILESYSTEMS = {"tmpfs"}
+
+
+def _mountpoints():
+    """(pseudo mountpoints to skip, tmpfs mountpoints to walk as roots)."""
+    pseudo, drops = set(SKIP_PATHS), set()
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                # mount paths escape spaces as \040
+                path = parts[1].replace("\\040", " ")
+                if parts[2] in PSEUDO_FILESYSTEMS:
+                    pseudo.add(path)
+                elif parts[2] in DROP_FILESYSTEMS:
+                    drops.add(path)
+    except Exception:
+        pass
+    # tmpfs inside /proc or /sys (e.g. /sys/fs/cgroup) is not a drop location
+    drops = {d for d in drops if not any(_under(d, p) for p in ("/proc", "/sys"))}
+    return pseudo, drops
+
+
+def _under(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class PermissionAuditor:
+    def __init__(self, max_workers: int = None, cross_mounts: bool = False, logger=None):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.cross_mounts = cross_mounts
+        self.logger = logger
+        self._lock = threading.Lock()
+        # serializes audits; the auditor is shared between threads
+        self._run_lock = threading.RLock()
+        self.last_full_audit = 0.0
+        # subtree path -> list of findings under it (for incremental re-audit)
+        self._subtrees: Dict[str, List[Dict[str, Any]]] = {}
+        self._roots: List[str] = []
+        self._known_uids = None
+        self._known_gids = None
+
+    # -----------------------------
+    # Ownership lookups (cached once per audit)
+    # -----------------------------
+    def _load_ids(self):
+        if not HAS_PWD:
+            self._known_uids, self._known_gids = None, None
+            return
+        try:
+            self._known_uids = {p.pw_uid for p in pwd.getpwall()}
+            self._known_gids = {g.gr_gid for g in grp.getgrall()}
+        except Exception:
+            self._known_uids, self._known_gids = None, None
+
+    # -----------------------------
+    # Classification of one lstat result
+    # -----------------------------
+    def _check(self, path: str, st: os.stat_result, is_dir: bool, out: List[Dict[str, Any]]):
+        mode = st.st_mode
+
+        if mode & stat.S_IWOTH:
+            if is_dir:
+                if not mode & stat.S_ISVTX:
+                    out.append({"kind": "world_writable_dir", "path": path, "severity": "high"})
+            else:
+                out.append({"kind": "world_writable_file", "path": path, "severity": "high"})
+
+        if not is_dir and stat.S_ISREG(mode):
+            if mode & stat.S_ISUID:
+                out.append({"kind": "setuid", "path": path, "severity": "medium", "uid": st.st_uid})
+            if mode & stat.S_ISGID:
+                out.append({"kind": "setgid", "path": path, "severity": "medium", "gid": st.st_gid})
+
+        if self._known_uids is not None and st.st_uid not in self._known_uids:
+            out.append({"kind": "unknown_owner", "path": path, "severity": "medium", "uid": st.st_uid})
+        elif self._known_gids is not None and st.st_gid not in self._known_gids:
+            out.append({"kind": "unknown_group", "path": path, "severity": "low", "gid": st.st_gid})
+
+    # -----------------------------
+    # Iterative walk of a single subtree
+    # -----------------------------
+    def _walk(self, top: str, root_dev: int, skip: set) -> List[Dict[str, Any]]:
+        findings: List[Dict[str, Any]] = []
+        stack = [top]
+        check = self._check
+        uids = self._known_uids
+        gids = self._known_gids
+        flagged_bits = stat.S_IWOTH | stat.S_ISUID | stat.S_ISGID
+        is_lnk, is_dir_mode = stat.S_ISLNK, stat.S_ISDIR
+        same_dev_only = not self.cross_mounts
+        while stack:
+            current = stack.pop()
+            try:
+                it = os.scandir(current)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    mode = st.st_mode
+                    if is_lnk(mode):
+                        continue
+                    is_dir = is_dir_mode(mode)
+                    # fast path: nothing interesting about this entry
+                    if (mode & flagged_bits
+                            or (uids is not None and st.st_uid not in uids)
+                            or (gids is not None and st.st_gid not in gids)):
+                        check(entry.path, st, is_dir, findings)
+                    if is_dir:
+                        path = entry.path
+                        if path in skip:
+                            continue
+                        if same_dev_only and st.st_dev != root_dev:
+                            continue
+                        stack.append(path)
+        return findings
+
+    def _split_subtrees(self, root: str, root_dev: int, skip: set, out: List[Dict[str, Any]]) -> List[str]:
+        """Audit the entries directly under root and return the subdirectories to fan out on."""
+        subtrees = []
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if stat.S_ISLNK(st.st_mode):
+                        continue
+                    is_dir = stat.S_ISDIR(st.st_mode)
+                    self._check(entry.path, st, is_dir, out)
+                    if is_dir and entry.path not in skip and (self.cross_mounts or st.st_dev == root_dev):
+                        subtrees.append(entry.path)
+        except OSError as e:
+            if self.logger:
+                self.logger.log(f"[PermissionAuditor] Cannot read {root}: {e}")
+        return subtrees
+
+    def _run(self, roots: Iterable[str]):
+        skip, drops = _mountpoints()
+        roots = [os.path.abspath(r) for r in roots]
+        # tmpfs mounts are on another device, so the walk below would stop at them
+        roots += sorted(d for d in drops if d not in roots and any(_under(d, r) for r in roots))
+        self._load_ids()
+        jobs = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for root in roots:
+                try:
+                    st = os.lstat(root)
+                except OSError:
+                    continue
+                top_findings: List[Dict[str, Any]] = []
+                self._check(root, st, stat.S_ISDIR(st.st_mode), top_findings)
+                if stat.S_ISDIR(st.st_mode):
+                    for sub in self._split_subtrees(root, st.st_dev, skip, top_findings):
+                        jobs.append((sub, pool.submit(self._walk, sub, st.st_dev, skip)))
+                # the root's own entries are stored under a "root:" key so reaudit(root) replaces them
+                with self._lock:
+                    self._subtrees["root:" + root] = top_findings
+            for sub, fut in jobs:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    if self.logger:
+                        self.logger.log(f"[PermissionAuditor] Walk failed for {sub}: {e}")
+                    result = []
+                with self._lock:
+                    self._subtrees[sub] = result
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def audit(self, roots: Iterable[str] = ("/",)) -> Dict[str, Any]:
+        """Full audit of the given roots. Replaces any previous results."""
+        with self._run_lock:
+            start = time.perf_counter()
+            with self._lock:
+                self._subtrees = {}
+                self._roots = [os.path.abspath(r) for r in roots]
+            self._run(self._roots)
+            self.last_full_audit = time.time()
+            return self._report(time.perf_counter() - start)
+
+    def reaudit(self, paths: Iterable[str]) -> Dict[str, Any]:
+        """
+        Incremental re-audit: walks only the given paths and replaces the
+        findings previously recorded under them. Falls back to a full audit
+        if no audit has run yet.
+        """
+        with self._run_lock:
+            if not self._roots:
+                return self.audit(paths)
+            return self._reaudit([os.path.abspath(p) for p in paths])
+
+    def _reaudit(self, paths: List[str]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with self._lock:
+            for key in list(self._subtrees):
+                sub = key[len("root:"):] if key.startswith("root:") else key
+                if any(sub == p or sub.startswith(p.rstrip(os.sep) + os.sep) for p in paths):
+                    del self._subtrees[key]
+                    continue
+                # drop stale findings under p from a broader subtree that contains it
+                for p in paths:
+                    if p.startswith(sub.rstrip(os.sep) + os.sep):
+                        self._subtrees[key] = [
+                            f for f in self._subtrees[key]
+                            if not (f["path"] == p or f["path"].startswith(p.rstrip(os.sep) + os.sep))
+                        ]
+        self._run(paths)
+        return self._report(time.perf_counter() - start)
+
+    @property
+    def audited_roots(self) -> List[str]:
+        return list(self._roots)
+
+    def report(self) -> Dict[str, Any]:
+        """Current findings without walking anything."""
+        return self._report(0.0)
+
+    def findings(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            merged = [f for sub in self._subtrees.values() for f in sub]
+        # a path re-audited as its own root also appears as an entry of its parent
+        seen = set()
+        unique = []
+        for f in merged:
+            key = (f["kind"], f["path"])
+            if key not in seen:
+                seen.add(key)
+                unique.append(f)
+        return unique
+
+    def _report(self, elapsed: float) -> Dict[str, Any]:
+        findings = self.findings()
+        counts: Dict[str, int] = {}
+        for f in findings:
+            counts[f["kind"]] = counts.get(f["kind"], 0) + 1
+        report = {
+            "roots": list(self._roots),
+            "duration_sec": round(elapsed, 3),
+            "counts": counts,
+            "findings": findings,
+        }
+        if self.logger:
+            self.logger.log(f"[PermissionAuditor] Audit finished in {report['duration_sec']}s: {counts}")
+        return report
+
+
+_default_auditor = None
+_default_lock = threading.Lock()
+
+
+def get_default_auditor(logger=None) -> PermissionAuditor:
+    """Process-wide auditor, shared by all SystemAnalyzerTool instances."""
+    global _default_auditor
+    with _default_lock:
+        if _default_auditor is None:
+            _default_auditor = PermissionAuditor(logger=logger)
+        return _default_auditor
@@ -0,0 +1,246 @@
+# signature_packs.py
+"""
+Signature packs for the File Scanner Tool.
+
+Detection rules are loaded from YAML/JSON pack files listed in
+config/settings.yaml (scanner.signature_packs) instead of being hardcoded:
+
+    pack: core
+    version: "1.0.0"
+    rules:
+      - {id: TG-CORE-0001, name: SQL Injection, category: injection,
+         severity: high, pattern: '(DROP TABLE|UNION SELECT)'}
+
+Packs are validated and compiled once into an immutable SignatureSet.
+SignaturePackManager.current() re-checks the pack files (at most once per
+`check_interval` seconds) and swaps in a new set when one changed; a scan
+that already holds the old set finishes with it, and a pack that fails
+validation leaves the previous set in place.
+
+Validated packs are cached on disk as JSON keyed by the pack's content
+hash, so a restart skips YAML parsing and validation for unchanged packs.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.config import get_setting, resolve_path
+
+try:
+    import yaml
+    HAS_YAML = True
+except Exception:
+    HAS_YAML = False
+
+SEVERITIES = ("low", "medium", "high", "critical")
+REQUIRED_FIELDS = ("id", "name", "category", "severity", "pattern")
+# bump when the cached (normalized) rule format changes
+CACHE_FORMAT = 1
+
+# used when no pack files are configured
+BUILTIN_PACK = {
+    "pack": "builtin",
+    "version": "1.0.0",
+    "rules": [
+        {"id": "TG-CORE-0001", "name": "SQL Injection", "category": "injection", "severity": "high",
+         "pattern": r"(DROP TABLE|UNION SELECT|--|;--)"},
+        {"id": "TG-CORE-0002", "name": "XSS", "category": "injection", "severity": "high",
+         "pattern": r"(<script>|javascript:)"},
+        {"id": "TG-CORE-0003", "name": "Hardcoded Password", "category": "secrets", "severity": "high",
+         "pattern": r"(password\s*=|pwd\s*=|\"password\")"},
+        {"id": "TG-CORE-0004", "name": "Dangerous API", "category": "code-execution", "severity": "high",
+         "pattern": r"(eval\(|exec\()"},
+    ],
+}
+
+
+class SignaturePackError(ValueError):
+    pass
+
+
+def validate_pack(pack: Dict[str, Any], origin: str = "<pack>") -> Dict[str, Any]:
+    """Check a parsed pack and return it in normalized form."""
+    if not isinstance(pack, dict) or not isinstance(pack.get("rules"), list):
+        raise SignaturePackError(f"{origin}: pack must be a mapping with a 'rules' list")
+    rules, seen = [], set()
+    for pos, rule in enumerate(pack["rules"]):
+        if not isinstance(rule, dict):
+            raise SignaturePackError(f"{origin}: rule #{pos} is not a mapping")
+        missing = [f for f in REQUIRED_FIELDS if not rule.get(f)]
+        if missing:
+            raise SignaturePackError(f"{origin}: rule #{pos} missing {missing}")
+        rule_id = str(rule["id"])
+        if rule_id in seen:
+            raise SignaturePackError(f"{origin}: duplicate rule id {rule_id}")
+        seen.add(rule_id)
+        severity = str(rule["severity"]).lower()
+        if severity not in SEVERITIES:
+            raise SignaturePackError(f"{origin}: rule {rule_id} has unknown severity '{severity}'")
+        flags = [str(f).upper() for f in rule.get("flags", ["IGNORECASE"])]
+        for flag in flags:
+            if not isinstance(getattr(re, flag, None), re.RegexFlag):
+                raise SignaturePackError(f"{origin}: rule {rule_id} has unknown flag '{flag}'")
+        try:
+            re.compile(rule["pattern"], _flag_bits(flags))
+        except re.error as e:
+            raise SignaturePackError(f"{origin}: rule {rule_id} has invalid pattern: {e}")
+        rules.append({
+            "id": rule_id,
+            "name": str(rule["name"]),
+            "category": str(rule["category"]),
+            "severity": severity,
+            "pattern": rule["pattern"],
+            "flags": flags,
+        })
+    return {"pack": str(pack.get("pack") or origin), "version": str(pack.get("version", "0")), "rules": rules}
+
+
+def _flag_bits(flags: List[str]) -> int:
+    bits = 0
+    for flag in flags:
+        bits |= getattr(re, flag)
+    return bits
+
+
+class SignatureSet:
+    """Immutable compiled rules from one or more packs."""
+
+    def __init__(self, packs: List[Dict[str, Any]], generation: int = 0):
+        self.packs = [{"pack": p["pack"], "version": p["version"], "rules": len(p["rules"])} for p in packs]
+        self.version = "+".join(f"{p['pack']}@{p['version']}" for p in packs) or "empty"
+        self.generation = generation
+        self.rules = []
+        seen = set()
+        for pack in packs:
+            for rule in pack["rules"]:
+                if rule["id"] in seen:
+                    raise SignaturePackError(f"rule id {rule['id']} defined in more than one pack")
+                seen.add(rule["id"])
+                self.rules.append({**rule, "regex": re.compile(rule["pattern"], _flag_bits(rule["flags"]))})
+
+    def match(self, text: str) -> List[Dict[str, Any]]:
+        return [
+            {"id": r["id"], "name": r["name"], "category": r["category"], "severity": r["severity"]}
+            for r in self.rules
+            if r["regex"].search(text)
+        ]
+
+
+class SignaturePackManager:
+    def __init__(self, pack_paths: List[str] = None, cache_dir: str = None,
+                 check_interval: float = 1.0, logger=None):
+        self.pack_paths = list(pack_paths or [])
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._stamps = None
+        self._last_check = 0.0
+        self._generation = 0
+        self._current: Optional[SignatureSet] = None
+        self.reload(force=True)
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    def _file_stamps(self):
+        stamps = []
+        for path in self.pack_paths:
+            try:
+                st = os.stat(path)
+                stamps.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append((path, None, None))
+        return tuple(stamps)
+
+    def _cache_path(self, digest: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _load_pack(self, path: str) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw + f"|{CACHE_FORMAT}".encode()).hexdigest()
+        cache_path = self._cache_path(digest)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+
+        if path.endswith(".json"):
+            parsed = json.loads(raw)
+        elif HAS_YAML:
+            parsed = yaml.safe_load(raw)
+        else:
+            raise SignaturePackError(f"{path}: PyYAML is required for YAML packs")
+        pack = validate_pack(parsed, origin=path)
+
+        if cache_path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".sigtmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(pack, f)
+                os.replace(tmp_path, cache_path)
+            except Exception as e:
+                if self.logger:
+                    self.logger.log(f"[SignaturePacks] Could not cache {path}: {e}")
+        return pack
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild the signature set if a pack file changed. Returns True on swap."""
+        stamps = self._file_stamps()
+        if not force and stamps == self._stamps:
+            return False
+        with self._lock:
+            try:
+                if self.pack_paths:
+                    packs = [self._load_pack(p) for p in self.pack_paths]
+                else:
+                    packs = [validate_pack(BUILTIN_PACK, origin="builtin")]
+                signatures = SignatureSet(packs, generation=self._generation + 1)
+            except Exception as e:
+                self._stamps = stamps
+                if self.logger:
+                    self.logger.log(f"[SignaturePacks] Keeping previous signatures, reload failed: {e}")
+                if self._current is None:
+                    self._current = SignatureSet([validate_pack(BUILTIN_PACK, origin="builtin")])
+                return False
+            self._generation += 1
+            self._stamps = stamps
+            # single reference assignment; scans holding the old set are unaffected
+            self._current = signatures
+        if self.logger:
+            self.logger.log(f"[SignaturePacks] Loaded {len(signatures.rules)} rules ({signatures.version})")
+        return True
+
+    def current(self) -> SignatureSet:
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.reload()
+        return self._current
+
+
+_default_manager = None
+_default_lock = threading.Lock()
+
+
+def get_default_manager(logger=None) -> SignaturePackManager:
+    """Process-wide manager built from settings.yaml, shared by all scanners."""
+    global _default_manager
+    with _default_lock:
+        if _default_manager is None:
+            paths = [resolve_path(p) for p in (get_setting("scanner", "signature_packs") or [])]
+            cache_dir = resolve_path(get_setting("scanner", "signature_cache_dir"))
+            _default_manager = SignaturePackManager(paths, cache_dir=cache_dir, logger=logger)
+        return _default_manager
@@ -0,0 +1,255 @@
+# similarity_index.py
+"""
+Similarity Index — near-duplicate detection of known malicious content.
+
+Exact SHA-256 matching misses trivially modified variants, so files are
+also compared by content similarity:
+- content is split into overlapping byte 5-grams (shingles)
+- a 128-value MinHash signature is computed with NumPy (multiply-shift
+  hashing over all shingles at once, processed in blocks)
+- signatures are bucketed by an LSH index (16 bands x 8 rows), so a query
+  only compares against entries sharing at least one band
+
+The index is filled from threats saved in MemoryBank (benign results are
+skipped). Each new threat's signature is stored on its finding aggregate
+when it is saved (MemoryBank.annotate_findings), so a new process rebuilds
+the LSH buckets from the stored signatures instead of decoding and
+re-shingling every threat; only threats saved before signatures were
+stored are shingled again. After that the index follows the bank
+incrementally through MemoryBank.iter_since over the threats section only,
+which also picks up threats saved by other processes. get_shared_index()
+keeps one index per memory file and process, so the history is read once,
+not once per scanner.
+
+NumPy is optional: without it the index stays empty and queries return [].
+"""
+
+import hashlib
+import os
+import threading
+from typing import Any, Dict, List
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    HAS_NUMPY = False
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# shingles hashed per block, bounds the temporary (block x NUM_PERM) matrix
+BLOCK = 8192
+DEFAULT_THRESHOLD = 0.5
+
+
+def _threat_info(threat: Dict[str, Any]) -> Dict[str, Any]:
+    return (threat.get("threat_info") if isinstance(threat, dict) else None) or {}
+
+
+def _known_bad_content(threat: Dict[str, Any]):
+    """File content of a saved threat as bytes, or None (no content, or a clean scan)."""
+    info = _threat_info(threat)
+    # clean scans are saved as threats too; they are not known-bad content
+    if info.get("threat_type") == "benign":
+        return None
+    content = (info.get("metadata") or {}).get("file_content")
+    if isinstance(content, str):
+        content = content.encode("utf-8", errors="replace")
+    return content if isinstance(content, bytes) and content else None
+
+
+class SimilarityIndex:
+    def __init__(self, memory=None, threshold: float = DEFAULT_THRESHOLD, seed: int = 7, logger=None):
+        self.memory = None
+        self.threshold = threshold
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._cursor = 0
+        self._signatures: Dict[str, Any] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [dict() for _ in range(BANDS)]
+        if HAS_NUMPY:
+            rng = np.random.default_rng(seed)
+            # multiply-shift hashing: odd 64-bit multipliers, top 32 bits kept
+            self._a = rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+            self._b = rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+        elif self.logger:
+            self.logger.log("[SimilarityIndex] numpy not installed — similarity matching disabled.")
+        if memory is not None:
+            self.bind(memory)
+
+    def bind(self, memory) -> None:
+        """Follow `memory` and store a signature with every threat saved through it."""
+        self.memory = memory
+        if HAS_NUMPY:
+            memory.annotate_findings("threats", self._annotate)
+
+    # -----------------------------
+    # Signatures
+    # -----------------------------
+    @staticmethod
+    def _shingles(data: bytes):
+        arr = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+        if len(arr) < SHINGLE_SIZE:
+            arr = np.concatenate([arr, np.zeros(SHINGLE_SIZE - len(arr), dtype=np.uint64)])
+        n = len(arr) - SHINGLE_SIZE + 1
+        # pack each 5-byte window into one integer
+        values = np.zeros(n, dtype=np.uint64)
+        for j in range(SHINGLE_SIZE):
+            values |= arr[j:j + n] << np.uint64(8 * (SHINGLE_SIZE - 1 - j))
+        return np.unique(values)
+
+    def signature(self, content) -> Any:
+        data = content.encode("utf-8", errors="replace") if isinstance(content, str) else bytes(content)
+        shingles = self._shingles(data)
+        sig = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+        shift = np.uint64(32)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(shingles), BLOCK):
+                block = shingles[start:start + BLOCK, None]
+                hashed = ((block * self._a + self._b) >> shift).astype(np.uint32)
+                np.minimum(sig, hashed.min(axis=0), out=sig)
+        return sig
+
+    def _annotate(self, threat: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields stored on a new threat's finding aggregate: its signature, or None if not indexed."""
+        content = _known_bad_content(threat)
+        if content is None:
+            return {"minhash": None}
+        return {"minhash": self.signature(content).astype("<u4").tobytes().hex()}
+
+    # -----------------------------
+    # Index maintenance
+    # -----------------------------
+    def add(self, entry_id: str, content, meta: Dict[str, Any] = None) -> None:
+        if not HAS_NUMPY or not content:
+            return
+        self._insert(entry_id, self.signature(content), meta)
+
+    def _insert(self, entry_id: str, sig, meta: Dict[str, Any] = None) -> None:
+        with self._lock:
+            if entry_id in self._signatures:
+                return
+            self._signatures[entry_id] = sig
+            self._meta[entry_id] = meta or {}
+            for band in range(BANDS):
+                key = sig[band * ROWS:(band + 1) * ROWS].tobytes()
+                self._buckets[band].setdefault(key, []).append(entry_id)
+
+    def _insert_stored(self, agg: Dict[str, Any]) -> None:
+        """Index a finding aggregate by the signature stored on it."""
+        sig = np.frombuffer(bytes.fromhex(agg["minhash"]), dtype="<u4").astype(np.uint32)
+        self._insert(agg["fingerprint"], sig, {
+            "threat_type": agg.get("category"),
+            "source": agg.get("source"),
+            "first_seen": agg.get("first_seen"),
+        })
+
+    def _load_stored(self, memory) -> bool:
+        """
+        Index the signatures stored on threat finding aggregates.
+        Returns False if some threats were saved without one.
+        """
+        complete = True
+        for agg in memory.iter_findings(origin="threats"):
+            if "minhash" not in agg:
+                complete = False
+            elif agg["minhash"]:
+                self._insert_stored(agg)
+        return complete
+
+    def refresh(self) -> int:
+        """Index threats saved to memory since the last refresh. Returns how many were added."""
+        if not HAS_NUMPY or self.memory is None:
+            return 0
+        with self._refresh_lock:
+            memory = self.memory
+            cursor = self._cursor
+            end = memory.cursor()
+            before = len(self)
+            if cursor == 0 and self._load_stored(memory):
+                # every threat up to `end` carried its signature
+                self._cursor = end
+                return len(self) - before
+            for record in memory.iter_since(cursor, sections=("threats",)):
+                end = max(end, record.get("seq", 0))
+                fingerprint = record.get("fingerprint")
+                if fingerprint in self._signatures:
+                    continue
+                agg = memory.get_finding(fingerprint) if fingerprint else None
+                if agg is not None and "minhash" in agg:
+                    if agg["minhash"]:
+                        self._insert_stored(agg)
+                    continue
+                # saved without a stored signature (older record or another writer)
+                threat = memory.resolve(record).get("threat") or {}
+                content = _known_bad_content(threat)
+                if content is None:
+                    continue
+                info = _threat_info(threat)
+                self.add(fingerprint or hashlib.sha256(content).hexdigest(), content, {
+                    "threat_type": info.get("threat_type"),
+                    "source": info.get("source"),
+                    "first_seen": record.get("ts"),
+                })
+            self._cursor = end
+        return len(self) - before
+
+    def __len__(self):
+        return len(self._signatures)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def query(self, content, threshold: float = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Known threats whose estimated Jaccard similarity with content is >= threshold."""
+        if not HAS_NUMPY or not content:
+            return []
+        self.refresh()
+        threshold = self.threshold if threshold is None else threshold
+        sig = self.signature(content)
+        with self._lock:
+            candidates = set()
+            for band in range(BANDS):
+                key = sig[band * ROWS:(band + 1) * ROWS].tobytes()
+                candidates.update(self._buckets[band].get(key, ()))
+            if not candidates:
+                return []
+            ids = list(candidates)
+            matrix = np.stack([self._signatures[i] for i in ids])
+            metas = [self._meta[i] for i in ids]
+        scores = (matrix == sig).mean(axis=1)
+        order = np.argsort(-scores)
+        results = []
+        for pos in order[:limit]:
+            score = float(scores[pos])
+            if score < threshold:
+                break
+            results.append({
+                "id": ids[pos],
+                "jaccard": round(score, 3),
+                "meta": metas[pos],
+                "message": f"similar to known threat {ids[pos][:12]} (Jaccard ~{score:.2f})",
+            })
+        return results
+
+
+_shared_indexes: Dict[str, SimilarityIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_index(memory, logger=None) -> SimilarityIndex:
+    """One index per memory file and process; the index follows the most recently passed bank."""
+    key = os.path.abspath(memory.file_path)
+    with _shared_lock:
+        index = _shared_indexes.get(key)
+        if index is None:
+            index = SimilarityIndex(memory, logger=logger)
+            _shared_indexes[key] = index
+        elif index.memory is not memory:
+            # same file, same sequence numbers: the cursor stays valid
+            index.bind(memory)
+        return index
@@ -1,21 +1,61 @@
 # system_analyzer.py
 """
 System Analyzer Tool
-Simulates scanning system configuration, permissions & network flags.
+Simulates scanning system configuration & network flags.
+File permissions are audited for real by PermissionAuditor. The auditor
+is shared per process: the first scan walks the audit roots, later scans
+only re-audit the drop directories (system.reaudit_paths) until the full
+audit is older than system.full_audit_interval_sec.
 """
 
+import os
+import time
 from typing import Dict, Any
 
+from tools.permission_auditor import PermissionAuditor, get_default_auditor
+from utils.config import get_setting
+
+# cap on how many permission findings are inlined into the scan result
+MAX_REPORTED_PERMISSIONS = 50
+
 
 class SystemAnalyzerTool:
-    def __init__(self):
-        pass
+    def __init__(self, audit_roots=("/",), logger=None, permission_auditor: PermissionAuditor = None):
+        self.audit_roots = [os.path.abspath(r) for r in audit_roots]
+        self.permission_auditor = permission_auditor or get_default_auditor(logger=logger)
+        self.reaudit_paths = get_setting("system", "reaudit_paths", ["/tmp", "/var/tmp", "/dev/shm"])
+        self.full_audit_interval = float(get_setting("system", "full_audit_interval_sec", 3600))
+
+    def _audit(self, changed_paths=None) -> Dict[str, Any]:
+        auditor = self.permission_auditor
+        if changed_paths:
+            return auditor.reaudit(changed_paths)
+        fresh = time.time() - auditor.last_full_audit < self.full_audit_interval
+        if fresh and auditor.audited_roots == self.audit_roots:
+            paths = [p for p in self.reaudit_paths if os.path.isdir(p)]
+            return auditor.reaudit(paths) if paths else auditor.report()
+        return auditor.audit(self.audit_roots)
+
+    def scan_system(self, changed_paths=None) -> Dict[str, Any]:
+        """
+        changed_paths: optional list of paths to re-audit incrementally
+        instead of walking all audit roots again.
+        """
+        audit = self._audit(changed_paths)
 
-    def scan_system(self) -> Dict[str, Any]:
+        severity_rank = {"high": 0, "medium": 1, "low": 2}
+        ranked = sorted(audit["findings"], key=lambda f: severity_rank.get(f["severity"], 3))
+        weak_permissions = [f"{f['kind']} {f['path']}" for f in ranked[:MAX_REPORTED_PERMISSIONS]]
 
         sample_data = {
             "open_ports": [22, 8080],
-            "weak_permissions": ["world_writable /tmp", "unsafe sudoers config"],
+            "weak_permissions": weak_permissions,
+            "permission_audit": {
+                "roots": audit["roots"],
+                "duration_sec": audit["duration_sec"],
+                "counts": audit["counts"],
+                "total_findings": len(audit["findings"]),
+            },
             "network_flags": ["suspicious outbound traffic detected"],
             "system_health": "AT-RISK"
         }
@@ -0,0 +1,47 @@
+# config.py
+"""
+Settings loader for ThreatGuard.
+Reads config/settings.yaml once and resolves config-relative paths.
+Falls back to empty settings when PyYAML or the file is missing.
+"""
+
+import os
+from typing import Any, Dict
+
+try:
+    import yaml
+    HAS_YAML = True
+except Exception:
+    HAS_YAML = False
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SETTINGS_FILE = os.environ.get("THREATGUARD_SETTINGS", os.path.join(REPO_ROOT, "config", "settings.yaml"))
+
+_cache = None
+
+
+def load_settings(reload: bool = False) -> Dict[str, Any]:
+    global _cache
+    if _cache is not None and not reload:
+        return _cache
+    data = {}
+    if HAS_YAML and os.path.exists(SETTINGS_FILE):
+        try:
+            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except Exception:
+            data = {}
+    _cache = data
+    return data
+
+
+def get_setting(section: str, key: str, default=None):
+    value = load_settings().get(section) or {}
+    return value.get(key, default) if isinstance(value, dict) else default
+
+
+def resolve_path(path: str) -> str:
+    """Paths in settings.yaml are relative to the repository root."""
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.join(REPO_ROOT, path)
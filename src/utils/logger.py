@@ -21,5 +21,9 @@ class ThreatLogger:
         if self.store_in_memory and self.logs is not None:
             self.logs.append(line)
 
-    def get_logs(self):
-        return self.logs if self.store_in_memory else []
+    def get_logs(self, since: int = 0):
+        return self.logs[since:] if self.store_in_memory else []
+
+    # position in the in-memory log; pass to get_logs(since=...) later
+    def mark(self) -> int:
+        return len(self.logs) if self.store_in_memory else 0
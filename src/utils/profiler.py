@@ -0,0 +1,183 @@
+# profiler.py
+"""
+On-demand profiling for ThreatGuard.
+
+    with profile_run(enabled, "action-run") as prof:
+        report = orchestrator.run()
+    report["profile"] = prof.summary
+
+When enabled, the block runs under cProfile and tracemalloc. Afterwards
+two files are written to the logs directory (next to logging.log_file in
+settings.yaml):
+- <label>-<timestamp>.prof  pstats dump (open with snakeviz / pstats)
+- <label>-<timestamp>.txt   top functions and top allocation sites
+and prof.summary holds the headline numbers for the report.
+
+When disabled, profile_run returns a shared no-op object: no profiler is
+created and cProfile / tracemalloc are not even imported. cProfile only
+sees the calling thread, so work in thread pools shows up as time spent
+waiting on futures. Only one profile runs at a time; a concurrent request
+gets a summary saying it was skipped.
+
+tracemalloc is process-wide and does not record threads, so its numbers
+include allocations made by other requests running at the same time; the
+summary says so ("scope": "process"). If tracing was already on before
+the session, the traced memory includes whatever was live at the start
+(baseline_traced_kb), and allocation sites are reported as the growth
+since a snapshot taken when the session started.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from utils.config import get_setting, resolve_path
+
+TOP_N = 15
+TRACE_FRAMES = 10
+
+_active = threading.Lock()
+
+
+def profiling_requested(value) -> bool:
+    """Interpret a header / env / query value ("1", "true", "yes", "on")."""
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _logs_dir() -> str:
+    log_file = get_setting("logging", "log_file", "logs/threatguard.log")
+    return resolve_path(os.path.dirname(log_file) or "logs")
+
+
+class _Disabled:
+    summary = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+def _snapshot():
+    import tracemalloc
+
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+
+
+class ProfileSession:
+    def __init__(self, label: str, out_dir: str = None):
+        self.label = "".join(c if c.isalnum() or c in "-_" else "-" for c in label) or "profile"
+        self.out_dir = out_dir or _logs_dir()
+        self.summary: Dict[str, Any] = None
+        self._owns_lock = False
+
+    def __enter__(self):
+        import cProfile
+        import tracemalloc
+
+        self._owns_lock = _active.acquire(blocking=False)
+        if not self._owns_lock:
+            self.summary = {"label": self.label, "skipped": "another profile is in progress"}
+            return self
+        self._started_tracing = not tracemalloc.is_tracing()
+        self._baseline = None
+        if self._started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        else:
+            # already tracing: compare against what is live now
+            self._baseline = _snapshot()
+        tracemalloc.reset_peak()
+        self._baseline_traced = tracemalloc.get_traced_memory()[0]
+        self._profiler = cProfile.Profile()
+        self._start = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if not self._owns_lock:
+            return False
+        import io
+        import pstats
+        import tracemalloc
+
+        try:
+            self._profiler.disable()
+            wall = time.perf_counter() - self._start
+            snapshot = _snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+        finally:
+            _active.release()
+
+        stats = pstats.Stats(self._profiler)
+        top_functions = []
+        for func, (cc, nc, tt, ct, _) in sorted(stats.stats.items(), key=lambda kv: -kv[1][3])[:TOP_N]:
+            filename, line, name = func
+            top_functions.append({
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": nc,
+                "total_sec": round(tt, 4),
+                "cumulative_sec": round(ct, 4),
+            })
+        if self._baseline is not None:
+            allocations = [s for s in snapshot.compare_to(self._baseline, "lineno") if s.size_diff > 0]
+            top_allocations = [
+                {"site": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1),
+                 "count": stat.count_diff}
+                for stat in allocations[:TOP_N]
+            ]
+        else:
+            allocations = snapshot.statistics("lineno")
+            top_allocations = [
+                {"site": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in allocations[:TOP_N]
+            ]
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.out_dir, f"{self.label}-{stamp}-{os.getpid()}")
+        files = {}
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            stats.dump_stats(base + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(40)
+            text.write("\nTop allocations (tracemalloc, by line, whole process)\n")
+            for stat in allocations[:40]:
+                text.write(f"{stat}\n")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+            files = {"profile_file": base + ".prof", "report_file": base + ".txt"}
+        except OSError as e:
+            files = {"write_error": str(e)}
+
+        self.summary = {
+            "label": self.label,
+            "wall_sec": round(wall, 4),
+            # tracemalloc covers every thread, not just this request
+            "scope": "process",
+            "baseline_traced_kb": round(self._baseline_traced / 1024, 1),
+            "peak_traced_kb": round(peak / 1024, 1),
+            "current_traced_kb": round(current / 1024, 1),
+            **files,
+            "top_functions": top_functions,
+            "top_allocations": top_allocations,
+        }
+        return False
+
+
+def profile_run(enabled, label: str, out_dir: str = None):
+    """Context manager that profiles the block when enabled, else does nothing."""
+    if not enabled:
+        return _DISABLED
+    return ProfileSession(label, out_dir)
@@ -0,0 +1,84 @@
+# report_writer.py
+"""
+Streaming JSON report writer for ThreatGuard.
+Writes a report to disk piece by piece instead of building the whole
+document with json.dump. Lists, generators and other iterators are written
+one element at a time, so memory records can be streamed straight from the
+MemoryBank without materializing them.
+"""
+
+import json
+import os
+import uuid
+from typing import Any, Dict, Iterator
+
+
+def _iter_chunks(obj: Any, indent: int, level: int) -> Iterator[str]:
+    pad = "\n" + " " * (indent * (level + 1)) if indent else ""
+    close_pad = "\n" + " " * (indent * level) if indent else ""
+    sep = ": " if indent else ":"
+
+    if isinstance(obj, dict):
+        if not obj:
+            yield "{}"
+            return
+        yield "{"
+        first = True
+        for key, value in obj.items():
+            yield ("" if first else ",") + pad + json.dumps(str(key), ensure_ascii=False) + sep
+            yield from _iter_chunks(value, indent, level + 1)
+            first = False
+        yield close_pad + "}"
+    elif isinstance(obj, (list, tuple)) or (hasattr(obj, "__iter__") and hasattr(obj, "__next__")):
+        yield "["
+        first = True
+        for item in obj:
+            yield ("" if first else ",") + pad
+            yield from _iter_chunks(item, indent, level + 1)
+            first = False
+        yield ("" if first else close_pad) + "]"
+    else:
+        yield json.dumps(obj, ensure_ascii=False, default=str)
+
+
+def _create_temp(dirn: str):
+    """
+    Exclusively create a temp file in `dirn`. Mode 0666 lets the kernel
+    apply the umask, so the report gets the mode a plain open() would give
+    (mkstemp always creates 0600).
+    """
+    while True:
+        tmp_path = os.path.join(dirn, f".reporttmp{uuid.uuid4().hex}")
+        try:
+            return os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+class StreamingReportWriter:
+    def __init__(self, path: str, indent: int = 2, buffer_size: int = 1 << 16):
+        self.path = path
+        self.indent = indent
+        self.buffer_size = buffer_size
+
+    def write(self, report: Dict[str, Any]) -> int:
+        """
+        Stream `report` to self.path (atomically replaced on success).
+        Returns the number of characters written.
+        """
+        dirn = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = _create_temp(dirn)
+        written = 0
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", buffering=self.buffer_size) as f:
+                for chunk in _iter_chunks(report, self.indent, 0):
+                    written += f.write(chunk)
+                written += f.write("\n")
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+            raise
+        return written